@@ -0,0 +1,274 @@
+"""
+Headless HTTP scoring API — same engine as the dashboard.
+
+Run with any ASGI server, e.g.::
+
+    uvicorn api:app --port 8000
+
+Endpoints
+---------
+GET  /health                      ready flag once the master table is loaded
+GET  /metrics                     METRIC_CONFIG (labels, types, defaults)
+GET  /counties                    county names
+GET  /lookup?county=&district=&school=
+                                  metric values + default-profile score/rank
+                                  within the row's county (county= only
+                                  needed when the district name is ambiguous)
+POST /score   {county?, level?, weights?, targets?, limit?}
+                                  ranked leaderboard under custom settings
+POST /rank    {county?, level?, weights?, targets?, names: [...]}
+                                  score/rank of specific districts or schools
+
+``names`` are district names at District level and "District / School"
+strings at School level. Omitting ``county`` in /score or /rank scores
+statewide; districts are then ranked per (County, District), and every
+row carries its County.
+"""
+import asyncio
+import json
+import math
+import os
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+
+from metrics import MISSING_COL, read_table
+from scoring import (
+    DISTRICT_AGG_COLS, LEADERBOARD_PATH, METRIC_CONFIG, default_settings,
+    rank_districts, rank_schools, read_leaderboards,
+)
+
+MASTER_PATH = "sarc_master.parquet"
+MAX_WORKERS = int(os.environ.get("SARC_API_WORKERS", os.cpu_count() or 1))
+# Requests allowed to wait for a worker before the API answers 503
+MAX_PENDING = int(os.environ.get("SARC_API_MAX_PENDING", 64))
+
+_COLUMNS = ["CDSCode", "County", "District", "School"] + list(METRIC_CONFIG) + [MISSING_COL]
+_LEVELS = ("School", "District")
+
+
+class BadRequest(Exception):
+    pass
+
+
+class Busy(Exception):
+    pass
+
+
+class ScoringService:
+    """Master table split once into per-county frames, shared by every request."""
+
+    def __init__(self, master_path=MASTER_PATH, leaderboard_path=LEADERBOARD_PATH):
+        df = read_table(master_path, columns=_COLUMNS)
+        self.statewide = df
+        self.by_county = {c: f.reset_index(drop=True) for c, f in df.groupby("County", sort=True)}
+        self.counties = list(self.by_county)
+        # Empty when the file was scored under another missing-data mode
+        self.leaderboards = read_leaderboards(leaderboard_path)
+
+    def settings_from(self, body):
+        """Default settings overridden by the request's weights / targets."""
+        settings = default_settings()
+        for col, w in _object(body, "weights").items():
+            if col not in METRIC_CONFIG:
+                raise BadRequest(f"unknown metric {col!r}")
+            if not _is_number(w) or not 0 <= w <= 10:
+                raise BadRequest(f"weight for {col!r} must be a number in 0–10")
+            settings[col]["weight"] = w
+        for col, t in _object(body, "targets").items():
+            cfg = METRIC_CONFIG.get(col)
+            if cfg is None or cfg["type"] != "target":
+                raise BadRequest(f"{col!r} is not a target metric")
+            if isinstance(t, str):
+                if t not in cfg["options"]:
+                    raise BadRequest(f"target for {col!r} must be one of {list(cfg['options'])}")
+                t = cfg["options"][t]
+            elif not _is_number(t):
+                raise BadRequest(f"target for {col!r} must be a number or one of {list(cfg['options'])}")
+            settings[col]["target"] = t
+        return settings
+
+    def frame_for(self, county):
+        if county is None:
+            return self.statewide
+        if not isinstance(county, str) or county not in self.by_county:
+            raise BadRequest(f"unknown county {county!r}")
+        return self.by_county[county]
+
+    def score(self, county, level, settings):
+        """Ranked frame for *county* (None = statewide) at *level*."""
+        if level not in _LEVELS:
+            raise BadRequest(f"level must be one of {list(_LEVELS)}")
+        frame = self.frame_for(county)
+        if settings == default_settings() and (county, level) in self.leaderboards:
+            return self.leaderboards[(county, level)]
+        scored = rank_schools(frame, settings)
+        return rank_districts(scored) if level == "District" else scored
+
+    def lookup(self, county, district, school=None):
+        frame = self.frame_for(county)
+        hit = frame[frame["District"] == district]
+        level = "District"
+        if school is not None:
+            hit = hit[hit["School"] == school]
+            level = "School"
+        if hit.empty:
+            return None
+        counties = sorted(hit["County"].unique())
+        if len(counties) > 1:
+            raise BadRequest(f"{district!r} is in several counties ({', '.join(counties)}); pass county")
+        # Ranked within its county, so the answer is the same with or without
+        # county= and comes straight from the leaderboards
+        ranked = self.score(counties[0], level, default_settings())
+        row = ranked[ranked["District"] == district]
+        if level == "School":
+            row = row[row["School"] == school]
+        return {"level": level, "total": len(ranked), "County": counties[0], **_records(row.head(1))[0]}
+
+
+def _is_number(value):
+    """A finite JSON number (booleans excluded)."""
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+
+def _object(body, key):
+    """body[key] as a dict ({} when absent)."""
+    value = body.get(key)
+    if value is None:
+        return {}
+    if not isinstance(value, dict):
+        raise BadRequest(f"{key} must be an object")
+    return value
+
+
+def _records(frame):
+    """JSON-safe records: NaN → null, _rank → rank."""
+    cols = [c for c in ["CDSCode", "County", "District", "School", "Custom Fit Score", "_rank"]
+            + DISTRICT_AGG_COLS[1:] if c in frame.columns]
+    out = []
+    for rec in frame[cols].to_dict("records"):
+        rec = {k: (None if isinstance(v, float) and math.isnan(v) else v) for k, v in rec.items()}
+        rec["rank"] = int(rec.pop("_rank"))
+        out.append(rec)
+    return out
+
+
+# ─── ASGI APP ──────────────────────────────────────────────────────────
+_service = None
+_pool = None
+_slots = None
+
+
+def _startup():
+    global _service, _pool, _slots
+    _service = ScoringService()
+    _pool = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="score")
+    _slots = asyncio.Semaphore(MAX_PENDING)
+
+
+async def _send_json(send, status, payload):
+    body = json.dumps(payload).encode()
+    await send({"type": "http.response.start", "status": status,
+                "headers": [(b"content-type", b"application/json"),
+                            (b"content-length", str(len(body)).encode())]})
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _read_json(receive):
+    chunks = []
+    while True:
+        msg = await receive()
+        chunks.append(msg.get("body", b""))
+        if not msg.get("more_body"):
+            break
+    raw = b"".join(chunks)
+    if not raw:
+        return {}
+    try:
+        body = json.loads(raw)
+    except ValueError:
+        raise BadRequest("body must be JSON")
+    if not isinstance(body, dict):
+        raise BadRequest("body must be a JSON object")
+    return body
+
+
+async def _run_scoring(fn, *args):
+    """Run CPU-bound scoring on the worker pool; Busy when the queue is full."""
+    if _slots.locked():
+        raise Busy()
+    async with _slots:
+        return await asyncio.get_running_loop().run_in_executor(_pool, fn, *args)
+
+
+def _score_job(body):
+    settings = _service.settings_from(body)
+    limit = body.get("limit")
+    if limit is not None and (isinstance(limit, bool) or not isinstance(limit, int) or limit < 0):
+        raise BadRequest("limit must be a non-negative integer")
+    ranked = _service.score(body.get("county"), body.get("level", "School"), settings)
+    rows = ranked if limit is None else ranked.head(limit)
+    return {"total": len(ranked), "rows": _records(rows)}
+
+
+def _rank_job(body):
+    settings = _service.settings_from(body)
+    names = body.get("names") or []
+    if not isinstance(names, list) or not all(isinstance(n, str) for n in names):
+        raise BadRequest("names must be a list of strings")
+    level = body.get("level", "School")
+    ranked = _service.score(body.get("county"), level, settings)
+    if level == "District":
+        keys = ranked["District"]
+    else:
+        keys = ranked["District"] + " / " + ranked["School"]
+    wanted = ranked[keys.isin(names)]
+    return {"total": len(ranked), "rows": _records(wanted)}
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        while True:
+            msg = await receive()
+            if msg["type"] == "lifespan.startup":
+                _startup()
+                await send({"type": "lifespan.startup.complete"})
+            elif msg["type"] == "lifespan.shutdown":
+                if _pool is not None:
+                    _pool.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+    if scope["type"] != "http":
+        return
+    if _service is None:
+        _startup()
+
+    method, path = scope["method"], scope["path"]
+    query = {k: v[0] for k, v in parse_qs(scope.get("query_string", b"").decode()).items()}
+    try:
+        if method == "GET" and path == "/health":
+            return await _send_json(send, 200, {"ok": True, "rows": len(_service.statewide)})
+        if method == "GET" and path == "/metrics":
+            return await _send_json(send, 200, METRIC_CONFIG)
+        if method == "GET" and path == "/counties":
+            return await _send_json(send, 200, _service.counties)
+        if method == "GET" and path == "/lookup":
+            if "district" not in query:
+                raise BadRequest("district is required")
+            hit = await _run_scoring(_service.lookup, query.get("county"),
+                                     query["district"], query.get("school"))
+            if hit is None:
+                return await _send_json(send, 404, {"error": "not found"})
+            return await _send_json(send, 200, hit)
+        if method == "POST" and path in ("/score", "/rank"):
+            body = await _read_json(receive)
+            result = await _run_scoring(_score_job if path == "/score" else _rank_job, body)
+            return await _send_json(send, 200, result)
+        return await _send_json(send, 404, {"error": f"no route {method} {path}"})
+    except BadRequest as exc:
+        return await _send_json(send, 400, {"error": str(exc)})
+    except Busy:
+        return await _send_json(send, 503, {"error": "scoring queue full, retry"})
+    except Exception:
+        traceback.print_exc()
+        return await _send_json(send, 500, {"error": "internal error"})
@@ -1,7 +1,17 @@
 ﻿import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
-import os
+import time
+from functools import partial
+
+from export import EXPORT_FORMATS, export_bytes
+from history import TREND_KEYS
+from metrics import card_groups, trend_cols
+from scoring import METRIC_CONFIG, PTS_SUFFIX, compare_selection
+from warmup import (
+    DEFAULT_COUNTY, data_version, load_geo, load_index, load_search,
+    load_trends, score_county, score_nearby, score_state,
+)
 
 # ─── CONFIG ────────────────────────────────────────────────────────────
 st.set_page_config(
@@ -563,153 +573,17 @@ _PLT = dict(
 )
 
 # ─── DATA ──────────────────────────────────────────────────────────────
-@st.cache_data
-def load_data():
-    if os.path.exists("sarc_master.parquet"):
-        return pd.read_parquet("sarc_master.parquet")
-    return pd.DataFrame()
-
-df_master = load_data()
+# Loaders and score caches live in warmup.py, which can fill them at server start
+# Read once per run; fragments reuse it so they score the same file as the indexes
+version = data_version()
+school_index = load_index(version)
+search_index = load_search(version)
+geo_index = load_geo(version)
 
 # ─── METRIC CONFIGURATION ──────────────────────────────────────────────
 
 # ─── Card groups ───
-CARD_GROUPS = [
-    {
-        "title": "Academic Excellence",
-        "icon":  "ðŸŽ“",
-        "css":   "a",
-        "keys":  ["SMATH_Y1", "SELA_Y1"],
-    },
-    {
-        "title": "Environment & Scale",
-        "icon":  "ðŸ«",
-        "css":   "c",
-        "keys":  ["AVG_SIZE"],
-    },
-    {
-        "title": "Student Demographics",
-        "icon":  "ðŸ‘¥",
-        "css":   "b",
-        "keys":  ["PERDI", "PEREL", "PERSD"],
-    },
-]
-
-METRIC_CONFIG = {
-    "SMATH_Y1": {
-        "label": "Math Proficiency",
-        "group": "Academic Performance",
-        "type": "linear",
-        "direction": "higher",
-        "default_weight": 8,
-        "tip": "Higher values favour schools with stronger math CAASPP scores.",
-    },
-    "SELA_Y1": {
-        "label": "English Language Arts",
-        "group": "Academic Performance",
-        "type": "linear",
-        "direction": "higher",
-        "default_weight": 8,
-        "tip": "Higher values favour schools with stronger ELA CAASPP scores.",
-    },
-    "AVG_SIZE": {
-        "label": "Class Size",
-        "group": "Environment",
-        "type": "linear",
-        "direction": "lower",
-        "default_weight": 5,
-        "tip": "Higher importance favours schools with smaller average class sizes.",
-    },
-    "PERDI": {
-        "label": "Socio-Econ Disadvantaged",
-        "group": "Student Demographics",
-        "type": "target",
-        "options": {"Affluent": 0, "Mixed": 50, "Disadvantaged": 100},
-        "default_weight": 3,
-        "default_pref": "Affluent",
-        "tip": "Affluent targets <10 %, Mixed ≈50 %, Disadvantaged targets >90 %.",
-    },
-    "PEREL": {
-        "label": "English Learners",
-        "group": "Student Demographics",
-        "type": "target",
-        "options": {"Few EL": 0, "Balanced": 50, "EL-Rich": 100},
-        "default_weight": 3,
-        "default_pref": "Few EL",
-        "tip": "Few EL targets <10 %, Balanced ≈50 %, EL-Rich targets >90 % English Learner students.",
-    },
-    "PERSD": {
-        "label": "Students w/ Disabilities",
-        "group": "Student Demographics",
-        "type": "target",
-        "options": {"Few SWD": 0, "Balanced": 50, "Inclusive": 100},
-        "default_weight": 2,
-        "default_pref": "Few SWD",
-        "tip": "Few SWD targets <10 %, Balanced ≈50 %, Inclusive targets >90 % Students w/ Disabilities.",
-    },
-}
-
-
-def calculate_custom_scores(df, settings):
-    """
-    Calculate a Custom Fit Score (0–10) for every row.
-
-    Uses percentile-rank normalisation with a concave curve (x^0.7)
-    so that above-average schools score closer to 10 while poor fits
-    still separate clearly toward 0.
-
-    Parameters
-    ----------
-    df : pd.DataFrame
-        School-level data (must contain the columns referenced in *settings*).
-    settings : dict
-        {column: {"weight": int, "target": float (target metrics only)}}.
-
-    Returns
-    -------
-    pd.DataFrame  –  copy of *df* with a 'Custom Fit Score' column, sorted desc.
-    """
-    scored = df.copy()
-    weighted_sum = pd.Series(0.0, index=scored.index)
-    total_weight = 0
-
-    for col, cfg in settings.items():
-        weight = cfg.get("weight", 0)
-        if weight == 0 or col not in scored.columns:
-            continue
-
-        values = pd.to_numeric(scored[col], errors="coerce")
-        median_val = values.median()
-        values = values.fillna(median_val if pd.notna(median_val) else 0)
-
-        metric = METRIC_CONFIG.get(col, {})
-        metric_type = metric.get("type", "linear")
-
-        if metric_type == "linear":
-            # Percentile rank (0-1): immune to outlier skew
-            normalized = values.rank(pct=True)
-            if metric.get("direction") == "lower":
-                normalized = 1.0 - normalized
-        else:  # target
-            target = cfg.get("target", 50)
-            distance = (values - target).abs()
-            # Smaller distance = better fit → higher percentile
-            normalized = 1.0 - distance.rank(pct=True)
-
-        # Concave curve: pushes above-average scores toward 1.0
-        normalized = normalized.clip(0, 1) ** 0.7
-
-        weighted_sum += normalized * weight
-        total_weight += weight
-
-    if total_weight > 0:
-        scored["Custom Fit Score"] = (weighted_sum / total_weight * 10).round(1)
-    else:
-        scored["Custom Fit Score"] = 5.0
-
-    return scored.sort_values("Custom Fit Score", ascending=False)
-
-
+CARD_GROUPS = card_groups()
 
 # ─── SESSION STATE ─────────────────────────────────────────────────────
 if "sel_ids" not in st.session_state:
@@ -732,19 +606,11 @@ def _set_district_mode():
     st.session_state["district_mode"] = True
 
 
-def _add_selection():
-    nid = st.session_state["sel_next_id"]
-    st.session_state["sel_ids"].append(nid)
-    st.session_state["sel_next_id"] = nid + 1
-
-
-def _remove_selection(sid):
-    if len(st.session_state["sel_ids"]) > 1:
-        st.session_state["sel_ids"].remove(sid)
-
-
 district_mode = st.session_state["district_mode"]
-all_counties = sorted(df_master["County"].unique())
+all_counties = school_index.counties
+# Seeded here rather than via index= so search jumps can set it too
+if "county_sel" not in st.session_state and all_counties:
+    st.session_state["county_sel"] = DEFAULT_COUNTY if DEFAULT_COUNTY in all_counties else all_counties[0]
 
 # ─── TOP BAR — MODE BUTTONS + COUNTY ──────────────────────────────────
 _col_mode, _col_spacer, _col_county = st.columns(
@@ -762,17 +628,101 @@ with _col_mode:
 
 with _col_county:
     sel_county = st.selectbox("County", all_counties,
-                              index=all_counties.index("San Diego") if "San Diego" in all_counties else 0,
                               label_visibility="collapsed",
                               key="county_sel")
 
-county_df = df_master[df_master["County"] == sel_county]
-districts = sorted(county_df["District"].unique())
+districts = school_index.districts(sel_county)
 
-# ─── SIDEBAR — RANKING PARAMETERS ───────────────────────────────────
-scoring_settings = {}
+
+# ─── SEARCH ───────────────────────────────────────────────────────────
+def _jump_to(hit):
+    """Point the first selection card (and county / mode) at a search hit."""
+    sid = st.session_state["sel_ids"][0]
+    st.session_state["county_sel"] = hit["county"]
+    st.session_state["district_mode"] = hit["kind"] == "District"
+    st.session_state[f"dist_{sid}"] = hit["district"]
+    schools = school_index.schools(hit["county"], hit["district"])
+    st.session_state[f"sch_{sid}"] = hit["school"] or (schools[0] if schools else None)
+    st.session_state["search_q"] = ""
+    st.rerun()
+
+
+@st.fragment(key="search")
+def _search():
+    q = st.text_input("Search", key="search_q", type="search", live="150ms",
+                      placeholder="Find a school or district — name, city or CDS code",
+                      label_visibility="collapsed")
+    if not q:
+        return
+    hits = search_index.query(q, limit=8)
+    if not hits:
+        st.caption("No matches")
+    for i, hit in enumerate(hits):
+        name = hit["school"] or hit["district"]
+        where = hit["district"] if hit["school"] else "District"
+        st.button(f"{name} · {where} · {hit['city']}, {hit['county']}",
+                  key=f"search_hit_{i}", on_click=_jump_to, args=(hit,),
+                  use_container_width=True)
+
+
+if search_index is not None:
+    with _col_spacer:
+        _search()
+
+# ─── RERUN SCOPES ─────────────────────────────────────────────────────
+# Sidebar controls, selection cards and the table are keyed fragments.
+# Widget callbacks rerun only the fragments whose output they change, so a
+# slider tick never re-emits the CSS, the top bar or the sidebar itself.
+DEBOUNCE_S = 0.15
+
+
+def _settings_changed():
+    st.session_state["_settings_changed_at"] = time.monotonic()
+    st.rerun(scope=["cards", "table"])
+
+
+def _set_target(col, value):
+    st.session_state[f"t_{col}"] = value
+    st.session_state["_settings_changed_at"] = time.monotonic()
+    st.rerun(scope=["controls", "cards", "table"])
+
+
+def _selection_changed():
+    st.rerun(scope=["cards", "table"])
+
+
+def _add_selection():
+    nid = st.session_state["sel_next_id"]
+    st.session_state["sel_ids"].append(nid)
+    st.session_state["sel_next_id"] = nid + 1
+    st.rerun(scope=["cards", "table"])
+
+
+def _remove_selection(sid):
+    if len(st.session_state["sel_ids"]) > 1:
+        st.session_state["sel_ids"].remove(sid)
+    st.rerun(scope=["cards", "table"])
+
+
+def _debounce_settings():
+    """
+    Hold scoring until the sliders have been still for DEBOUNCE_S.
+
+    The placeholder writes give Streamlit a chance to interrupt this run
+    when a newer slider event arrives, so a burst of ticks during a drag
+    pays for one scoring pass instead of one per tick.
+    """
+    wait = st.session_state.get("_settings_changed_at", 0) + DEBOUNCE_S - time.monotonic()
+    if wait <= 0:
+        return
+    slot = st.empty()
+    while wait > 0:
+        time.sleep(min(wait, 0.03))
+        slot.empty()
+        wait = st.session_state["_settings_changed_at"] + DEBOUNCE_S - time.monotonic()
 
 
+# ─── SIDEBAR — RANKING PARAMETERS ───────────────────────────────────
 def _handle_reset():
     """Reset all weights to default and targets to first directional option."""
     for _col, _cfg in METRIC_CONFIG.items():
@@ -780,9 +730,38 @@ def _handle_reset():
         if _cfg["type"] == "target":
             _opts = list(_cfg["options"].keys())
             st.session_state[f"t_{_col}"] = _opts[0]
+    st.session_state["_settings_changed_at"] = time.monotonic()
+    st.rerun(scope=["controls", "cards", "table"])
 
 
-with st.sidebar:
+def _target_options(cfg):
+    opts = list(cfg["options"].keys())
+    if len(opts) > 2:
+        opts = [opts[0], opts[-1]]
+    return opts
+
+
+for _col, _cfg in METRIC_CONFIG.items():
+    if f"w_{_col}" not in st.session_state:
+        st.session_state[f"w_{_col}"] = _cfg["default_weight"]
+    if _cfg["type"] == "target" and f"t_{_col}" not in st.session_state:
+        st.session_state[f"t_{_col}"] = _target_options(_cfg)[0]
+
+
+def _current_settings():
+    """Scoring settings from the sidebar's session-state keys."""
+    settings = {}
+    for grp in CARD_GROUPS:
+        for col in grp["keys"]:
+            cfg = METRIC_CONFIG[col]
+            settings[col] = {"weight": st.session_state[f"w_{col}"]}
+            if cfg["type"] == "target":
+                settings[col]["target"] = cfg["options"].get(st.session_state[f"t_{col}"], 50)
+    return settings
+
+
+@st.fragment(key="controls")
+def _controls():
     st.markdown('<div class="reset-btn">', unsafe_allow_html=True)
     st.button("↺ Reset", on_click=_handle_reset, use_container_width=False)
     st.markdown('</div>', unsafe_allow_html=True)
@@ -791,15 +770,8 @@ with st.sidebar:
         for col in grp["keys"]:
             cfg = METRIC_CONFIG[col]
 
-            if f"w_{col}" not in st.session_state:
-                st.session_state[f"w_{col}"] = cfg["default_weight"]
-
             if cfg["type"] == "target":
-                opts = list(cfg["options"].keys())
-                if len(opts) > 2:
-                    opts = [opts[0], opts[-1]]
-                if f"t_{col}" not in st.session_state:
-                    st.session_state[f"t_{col}"] = opts[0]
+                opts = _target_options(cfg)
                 selected = st.session_state[f"t_{col}"]
 
                 _lbl_c, _b1_c, _b2_c = st.columns([5, 1.4, 1.4], vertical_alignment="center")
@@ -811,75 +783,66 @@ with st.sidebar:
                 with _b1_c:
                     st.button(
                         opts[0], key=f"targetbtn_{col}_0",
-                        on_click=lambda c=col, v=opts[0]: st.session_state.update({f"t_{c}": v}),
+                        on_click=_set_target, args=(col, opts[0]),
                         use_container_width=True,
                         type="primary" if selected == opts[0] else "secondary",
                     )
                 with _b2_c:
                     st.button(
                         opts[1], key=f"targetbtn_{col}_1",
-                        on_click=lambda c=col, v=opts[1]: st.session_state.update({f"t_{c}": v}),
+                        on_click=_set_target, args=(col, opts[1]),
                         use_container_width=True,
                         type="primary" if selected == opts[1] else "secondary",
                     )
 
-                target_val = cfg["options"].get(selected, 50)
-                w = st.slider(
+                st.slider(
                     cfg["label"],
                     min_value=0, max_value=10, step=1,
                     key=f"w_{col}",
                     help=cfg.get("tip", ""),
                     label_visibility="collapsed",
+                    on_change=_settings_changed,
                 )
-                scoring_settings[col] = {"weight": w, "target": target_val}
             else:
-                w = st.slider(
+                st.slider(
                     cfg["label"],
                     min_value=0, max_value=10, step=1,
                     key=f"w_{col}",
                     help=cfg.get("tip", ""),
+                    on_change=_settings_changed,
                 )
-                scoring_settings[col] = {"weight": w}
+
+
+with st.sidebar:
+    _controls()
 
 # ─── SCORING ──────────────────────────────────────────────────────────
-scored_county = calculate_custom_scores(county_df, scoring_settings)
-scored_county["_rank"] = scored_county["Custom Fit Score"].rank(
-    ascending=False, method="min").astype(int)
-total_ranked = len(scored_county)
-
-# Build immutable lookup dicts so selection cards can't mutate scores
-# Use (District, School) composite key — some school names exist in multiple districts
-_school_scores = {}
-for _, _r in scored_county.iterrows():
-    _school_scores[(_r["District"], _r["School"])] = (_r["Custom Fit Score"], _r["_rank"])
-
-if district_mode:
-    _num_cols = ["Custom Fit Score", "SMATH_Y1", "SELA_Y1", "AVG_SIZE", "PERDI", "PEREL", "PERSD"]
-    _num_cols = [c for c in _num_cols if c in scored_county.columns]
-    _dist_agg = (
-        scored_county.groupby("District")[_num_cols]
-        .mean().round(1).reset_index()
-        .sort_values("Custom Fit Score", ascending=False)
-    )
-    _dist_agg["_rank"] = _dist_agg["Custom Fit Score"].rank(
-        ascending=False, method="min").astype(int)
-    total_ranked = len(_dist_agg)
-    _dist_scores = dict(zip(_dist_agg["District"],
-                            zip(_dist_agg["Custom Fit Score"],
-                                _dist_agg["_rank"])))
+def _near_point(text):
+    """(lat, lon) for the proximity box: ZIP / city / CDS, else the best search hit."""
+    point = geo_index.locate(text)
+    if point is None and search_index is not None:
+        hits = search_index.query(text, limit=1)
+        if hits:
+            point = geo_index.locate(hits[0]["cds"]) or geo_index.locate(hits[0]["city"])
+    return point
 
 
-def _get_score_rank(name, district=None):
+def _get_score_rank(lookup, key):
     """Get score and rank for a school or district from pre-built lookup."""
-    if district_mode:
-        sr = _dist_scores.get(name)
-    else:
-        sr = _school_scores.get((district, name))
-    if sr:
+    sr = lookup.get(key)
+    # NaN score: no data for any weighted metric, so no meaningful rank
+    if sr and pd.notna(sr[0]):
         return sr[0], int(sr[1])
     return None, None
 
 
+def _breakdown_help(points):
+    """Tooltip listing the points each weighted metric adds to a score ({<metric>_PTS: points})."""
+    lines = [f"{METRIC_CONFIG[col.removesuffix(PTS_SUFFIX)]['short']}: {pts:.2f}"
+             for col, pts in points.items() if pd.notna(pts)]
+    return "**Score breakdown**\n\n" + "  \n".join(lines) if lines else None
+
+
 def _score_hue(score):
     """HSL hue: red(3) -> yellow(6) -> green(9)."""
     if score is None:
@@ -891,7 +854,7 @@ def _score_hue(score):
     return int(60 + (pct - 0.5) * 2 * 70)
 
 
-def _mini_score_html(score, rank):
+def _mini_score_html(score, rank, total_ranked, county):
     """Compact score circle + rank text for selection cards."""
     if score is not None:
         hue = _score_hue(score)
@@ -901,7 +864,7 @@ def _mini_score_html(score, rank):
         bg = BORDER
         s_text = "—"
     r_num = f"#{rank}" if rank else ""
-    r_ctx = f"of {total_ranked} in {sel_county} County" if rank else ""
+    r_ctx = f"of {total_ranked} in {county} County" if rank else ""
     return f"""
     <div style="display:flex;align-items:center;gap:14px;">
         <div style="width:48px;height:48px;border-radius:50%;background:{bg};
@@ -919,77 +882,104 @@ def _mini_score_html(score, rank):
     """
 
 
+def _compare(scored_county, district_mode):
+    """Every selection side by side: metric values, percentiles and score points."""
+    sel_ids = st.session_state["sel_ids"]
+    if district_mode:
+        picks = [st.session_state[f"dist_{sid}"] for sid in sel_ids]
+    else:
+        picks = [(st.session_state[f"dist_{sid}"], st.session_state[f"sch_{sid}"]) for sid in sel_ids]
+    comp = compare_selection(scored_county, picks, _current_settings(),
+                             level="District" if district_mode else "School")
+    if len(comp) < 2:
+        return
+    label = "District" if district_mode else "School"
+    names = comp.index if district_mode else comp.index.get_level_values("School")
+    score_cfg = st.column_config.NumberColumn("⭐", format="%.1f", width=25)
+
+    def _view(field, cfg_for):
+        view = comp[field].set_axis(names)
+        view.insert(0, "Custom Fit Score", comp["Custom Fit Score", ""].to_numpy())
+        cfg = {"Custom Fit Score": score_cfg}
+        cfg.update({c: cfg_for(c, m) for c, m in METRIC_CONFIG.items() if c in view.columns})
+        st.dataframe(view.rename_axis(label).reset_index(), column_config=cfg, hide_index=True)
+
+    t_val, t_pct, t_pts = st.tabs(["Metrics", "Percentiles", "Score breakdown"])
+    with t_val:
+        _view("value", lambda c, m: st.column_config.NumberColumn(m["short"], format=m["format"]))
+    with t_pct:
+        _view("percentile", lambda c, m: st.column_config.ProgressColumn(
+            m["short"], format="%.0f", min_value=0, max_value=100,
+            help="Percentile in the county, in the direction your settings favour"))
+    with t_pts:
+        _view("points", lambda c, m: st.column_config.NumberColumn(
+            m["short"], format="%.2f", help="Points this metric adds to the Custom Fit Score"))
+
+
 # ─── SELECTION CARDS ──────────────────────────────────────────────────
-selected_labels = []
+@st.fragment(key="cards")
+def _cards(county, districts, district_mode):
+    _debounce_settings()
+    scored_county, dist_agg = score_county(county, _current_settings(), version)
 
-for sid in st.session_state["sel_ids"]:
-    # Always render both dropdowns so session state stays in sync across modes
-    _c_dist, _c_sch, _c_score, _c_rm = st.columns(
-        [1.2, 1.2, 3, 0.3], gap="small", vertical_alignment="center"
-    )
-    with _c_dist:
-        d = st.selectbox("District", districts, key=f"dist_{sid}",
-                         label_visibility="collapsed")
-    sch_list = sorted(county_df[county_df["District"] == d]["School"].unique())
-    with _c_sch:
-        s = st.selectbox("School", sch_list, key=f"sch_{sid}",
-                         label_visibility="collapsed",
-                         disabled=district_mode)
+    # Build immutable lookup dicts so selection cards can't mutate scores
+    # Use (District, School) composite key — some school names exist in multiple districts
     if district_mode:
-        score, rank = _get_score_rank(d)
-        selected_labels.append(d)
+        ranked = dist_agg
+        keys = list(dist_agg["District"])
     else:
-        score, rank = _get_score_rank(s, district=d)
-        selected_labels.append((d, s))
-    with _c_score:
-        st.markdown(_mini_score_html(score, rank), unsafe_allow_html=True)
-    with _c_rm:
-        if len(st.session_state["sel_ids"]) > 1:
-            st.button("✕", key=f"rm_{sid}",
-                      on_click=_remove_selection, args=(sid,))
-
-# Add button
-st.markdown('<div class="add-btn">', unsafe_allow_html=True)
-st.button("＋ Add", on_click=_add_selection, use_container_width=False)
-st.markdown('</div>', unsafe_allow_html=True)
+        ranked = scored_county
+        keys = list(zip(scored_county["District"], scored_county["School"]))
+    lookup = dict(zip(keys, zip(ranked["Custom Fit Score"], ranked["_rank"])))
+    # Score points kept by the scoring pass, for the breakdown tooltip
+    pts_cols = [c for c in ranked.columns if c.endswith(PTS_SUFFIX)]
+    breakdown = dict(zip(keys, ranked[pts_cols].to_numpy()))
+
+    for sid in st.session_state["sel_ids"]:
+        # Always render both dropdowns so session state stays in sync across modes
+        _c_dist, _c_sch, _c_score, _c_rm = st.columns(
+            [1.2, 1.2, 3, 0.3], gap="small", vertical_alignment="center"
+        )
+        with _c_dist:
+            d = st.selectbox("District", districts, key=f"dist_{sid}",
+                             label_visibility="collapsed", on_change=_selection_changed)
+        sch_list = school_index.schools(county, d)
+        with _c_sch:
+            s = st.selectbox("School", sch_list, key=f"sch_{sid}",
+                             label_visibility="collapsed",
+                             disabled=district_mode, on_change=_selection_changed)
+        key = d if district_mode else (d, s)
+        score, rank = _get_score_rank(lookup, key)
+        points = breakdown.get(key) if score is not None else None
+        with _c_score:
+            st.markdown(_mini_score_html(score, rank, len(ranked), county),
+                        unsafe_allow_html=True,
+                        help=None if points is None else _breakdown_help(dict(zip(pts_cols, points))))
+        with _c_rm:
+            if len(st.session_state["sel_ids"]) > 1:
+                st.button("✕", key=f"rm_{sid}",
+                          on_click=_remove_selection, args=(sid,))
+
+    # Add button
+    st.markdown('<div class="add-btn">', unsafe_allow_html=True)
+    st.button("＋ Add", on_click=_add_selection, use_container_width=False)
+    st.markdown('</div>', unsafe_allow_html=True)
+
+    _compare(scored_county, district_mode)
+
+
+_cards(sel_county, districts, district_mode)
 
 st.markdown("<div style='margin-bottom:1.2rem;'></div>", unsafe_allow_html=True)
 
 # ─── DATA TABLE ───────────────────────────────────────────────────────
-if district_mode:
-    scored_display = _dist_agg
-    display_cols = ["Custom Fit Score", "District",
-                    "SMATH_Y1", "SELA_Y1", "AVG_SIZE", "PERDI", "PEREL", "PERSD"]
-else:
-    scored_display = scored_county
-    display_cols = ["Custom Fit Score", "School", "District",
-                    "SMATH_Y1", "SELA_Y1", "AVG_SIZE", "PERDI", "PEREL", "PERSD"]
-
-display_cols = [c for c in display_cols if c in scored_display.columns]
-
-col_cfg = {
-    "Custom Fit Score": st.column_config.NumberColumn("⭐", format="%.1f", width=25),
-    "SMATH_Y1": st.column_config.NumberColumn("Math %",   format="%.1f", width="small"),
-    "SELA_Y1":  st.column_config.NumberColumn("ELA %",    format="%.1f", width="small"),
-    "AVG_SIZE": st.column_config.NumberColumn("Class Sz", format="%.1f", width="small"),
-    "PERDI":    st.column_config.NumberColumn("Disadv %", format="%.1f", width="small"),
-    "PEREL":    st.column_config.NumberColumn("EL %",     format="%.1f", width="small"),
-    "PERSD":    st.column_config.NumberColumn("SWD %",    format="%.1f", width="small"),
-}
-
-_table_df = scored_display[display_cols].copy().reset_index(drop=True)
-_selected_set = set(selected_labels)
-
-
-def _highlight_selected(row):
-    """Highlight rows matching any user selection."""
-    if district_mode:
-        val = row.get("District", "")
-    else:
-        val = (row.get("District", ""), row.get("School", ""))
-    if val in _selected_set:
-        return [f"background-color: rgba(0,212,255,0.12); color: {ACCENT_P}"] * len(row)
-    return [""] * len(row)
+col_cfg = {"Custom Fit Score": st.column_config.NumberColumn("⭐", format="%.1f", width=25),
+           "Miles": st.column_config.NumberColumn("Mi", format="%.1f", width="small")}
+for _col, _cfg in METRIC_CONFIG.items():
+    col_cfg[_col] = st.column_config.NumberColumn(_cfg["short"], format=_cfg["format"], width="small")
+    if _cfg.get("trend"):
+        col_cfg[f"{_col}_CHG"] = st.column_config.NumberColumn(
+            _cfg["short"].rstrip(" %") + " Δ", format="%+.1f", width="small")
 
 
 def _score_bar(col):
@@ -999,6 +989,8 @@ def _score_bar(col):
         try:
             s = float(v)
         except (TypeError, ValueError):
+            s = float("nan")
+        if pd.isna(s):
             styles.append("")
             continue
         clamped = min(max(s, 3.0), 9.0)
@@ -1014,18 +1006,117 @@ def _score_bar(col):
     return styles
 
 
-_styled = (_table_df.style
-           .apply(_highlight_selected, axis=1)
-           .apply(_score_bar, subset=["Custom Fit Score"])
-)
+# Proximity radius choices (miles)
+NEAR_MILES = [2, 5, 10, 25, 50]
+
+
+def _near_filter(county):
+    """Proximity box above the table; returns (point, miles) or None."""
+    _c_near, _c_mi = st.columns([3.4, 0.8], gap="small", vertical_alignment="bottom")
+    with _c_near:
+        q = st.text_input("Near", key="near_q",
+                          placeholder=f"Rank {county} County — or enter a ZIP, address, city or school to rank nearby",
+                          label_visibility="collapsed")
+    with _c_mi:
+        miles = st.selectbox("Radius", NEAR_MILES, index=NEAR_MILES.index(10), key="near_mi",
+                             format_func=lambda m: f"within {m} mi", label_visibility="collapsed")
+    if not q:
+        return None
+    point = _near_point(q)
+    if point is None:
+        st.caption(f"Couldn't place “{q}” — showing {county} County")
+        return None
+    return (float(point[0]), float(point[1])), miles
+
+
+@st.fragment(key="table")
+def _table(county, district_mode):
+    near = _near_filter(county) if geo_index.size else None
+    if near:
+        scored_county, dist_agg = score_nearby(*near, _current_settings(), version)
+    else:
+        scored_county, dist_agg = score_county(county, _current_settings(), version)
+    if district_mode:
+        scored_display = dist_agg
+        display_cols = ["Custom Fit Score", "District"] + list(METRIC_CONFIG)
+        selected_set = {st.session_state[f"dist_{sid}"] for sid in st.session_state["sel_ids"]}
+    else:
+        scored_display = scored_county
+        display_cols = ["Custom Fit Score", "School", "District", "Miles"] + list(METRIC_CONFIG)
+        selected_set = {(st.session_state[f"dist_{sid}"], st.session_state[f"sch_{sid}"])
+                        for sid in st.session_state["sel_ids"]}
+
+    # Nearby results cross county lines, so their trends come from statewide history
+    trends = load_trends(None if near else county, "District" if district_mode else "School", version)
+    if not trends.empty and trend_cols():
+        # County leaderboards carry no County column; their trends are one county's
+        keys = [k for k in TREND_KEYS["District" if district_mode else "School"] if k in scored_display.columns]
+        scored_display = scored_display.merge(trends, on=keys, how="left")
+        # Δ columns go right after the last trended metric
+        at = display_cols.index(trend_cols()[-1]) + 1
+        display_cols[at:at] = [f"{c}_CHG" for c in trend_cols()]
+
+    display_cols = [c for c in display_cols if c in scored_display.columns]
+    table_df = scored_display[display_cols].copy().reset_index(drop=True)
+
+    def _highlight_selected(row):
+        """Highlight rows matching any user selection."""
+        if district_mode:
+            val = row.get("District", "")
+        else:
+            val = (row.get("District", ""), row.get("School", ""))
+        if val in selected_set:
+            return [f"background-color: rgba(0,212,255,0.12); color: {ACCENT_P}"] * len(row)
+        return [""] * len(row)
+
+    styled = (table_df.style
+              .apply(_highlight_selected, axis=1)
+              .apply(_score_bar, subset=["Custom Fit Score"])
+    )
 
-st.dataframe(
-    _styled,
-    column_config=col_cfg,
-    use_container_width=True,
-    hide_index=True,
-    height=740,
-)
+    st.dataframe(
+        styled,
+        column_config=col_cfg,
+        use_container_width=True,
+        hide_index=True,
+        height=740,
+    )
+
+    _c_fmt, _c_scope, _c_dl = st.columns([0.8, 0.8, 3.4], gap="small", vertical_alignment="bottom")
+    with _c_fmt:
+        fmt = st.selectbox("Format", list(EXPORT_FORMATS), key="export_fmt",
+                           format_func=str.upper, label_visibility="collapsed")
+    with _c_scope:
+        # "County" exports whatever the table is scoped to (county or nearby)
+        here = f"Within {near[1]} mi" if near else county
+        scope = st.selectbox("Scope", ["County", "Statewide"], key="export_scope",
+                             format_func=lambda o: here if o == "County" else o,
+                             label_visibility="collapsed")
+    with _c_dl:
+        level = "District" if district_mode else "School"
+        name = "nearby" if near and scope == "County" else county if scope == "County" else scope
+        st.download_button(
+            "⤓ Export", data=partial(_export_data, county, scope, level, _current_settings(), fmt, near, version),
+            file_name=f"sarc_{level.lower()}_rankings_{name.replace(' ', '_').lower()}.{fmt}",
+            mime=EXPORT_FORMATS[fmt], on_click="ignore",
+        )
+
+
+def _export_data(county, scope, level, settings, fmt, near=None, data_version=None):
+    """Export bytes built from the cached score frames, not the styled table."""
+    if scope == "Statewide":
+        schools, dists = score_state(settings, data_version)
+    elif near:
+        schools, dists = score_nearby(*near, settings, data_version)
+    else:
+        schools, dists = score_county(county, settings, data_version)
+    ranked = dists if level == "District" else schools
+    if scope != "Statewide" and not near and "County" not in ranked.columns:
+        ranked = ranked.assign(County=county)
+    return export_bytes(ranked, fmt, level=level)
+
+
+_table(sel_county, district_mode)
 
 # ─── FOOTER ────────────────────────────────────────────────────────────
 st.markdown(
@@ -0,0 +1,71 @@
+"""
+History benchmark: trend queries over 1, 5 and 10 stored years.
+
+Builds throwaway history stores from the current master table, one
+partition per year with slightly perturbed metrics, and times the queries
+the dashboard and scripts run against it: the app's Δ columns
+(latest_changes for one county and statewide) and a full-span trend()
+for one metric, against today's single-year load (the dashboard's read
+of the master table). The app's Δ queries read only the two latest
+partitions, so they should stay at or under the load time however many
+years are stored ("Δ vs load"). A full-span trend() reads every year, so
+it grows with the span; "trend ms/yr" is its statewide cost per year.
+
+    python bench_history.py --years 1 5 10 --repeat 10
+"""
+import argparse
+import tempfile
+import timeit
+
+import numpy as np
+import pyarrow.parquet as pq
+
+from history import append_year, latest_changes, trend
+from metrics import METRIC_CONFIG, master_columns, read_table, trend_cols
+
+MASTER_PATH = "sarc_master.parquet"
+
+
+def _store(df, n_years, root, rng):
+    """Write *n_years* years ending 2024-25, each a perturbed copy of *df*."""
+    for i in range(n_years):
+        start = 2024 - n_years + 1 + i
+        year = df.assign(**{c: (df[c] + rng.normal(0, 2, len(df))).round(1) for c in METRIC_CONFIG})
+        append_year(year, year=f"{start}-{(start + 1) % 100:02d}", root=root)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--years", type=int, nargs="+", default=[1, 5, 10])
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    present = pq.read_schema(MASTER_PATH).names
+    columns = [c for c in master_columns() if c in present]
+    df = read_table(MASTER_PATH, columns=columns)
+    county = df["County"].value_counts().index[0]
+    metric = trend_cols()[0] if trend_cols() else next(iter(METRIC_CONFIG))
+
+    def best(fn):
+        return min(timeit.repeat(fn, number=1, repeat=args.repeat)) * 1000
+
+    t_load = best(lambda: read_table(MASTER_PATH, columns=columns))
+    print(f"Single-year load (master table, {len(df)} rows): {t_load:.1f} ms")
+    print(f"{'years':>5}{'Δ county ms':>13}{'Δ state ms':>12}{'Δ vs load':>11}"
+          f"{'trend county ms':>17}{'trend state ms':>16}{'trend ms/yr':>13}")
+    rng = np.random.default_rng(0)
+    for n_years in args.years:
+        with tempfile.TemporaryDirectory() as root:
+            _store(df, n_years, root, rng)
+            times = [
+                best(lambda: latest_changes(trend_cols(), county=county, root=root)),
+                best(lambda: latest_changes(trend_cols(), root=root)),
+                best(lambda: trend(metric, county=county, root=root)),
+                best(lambda: trend(metric, root=root)),
+            ]
+        print(f"{n_years:>5}{times[0]:>13.1f}{times[1]:>12.1f}{max(times[:2]) / t_load:>10.2f}x"
+              f"{times[2]:>17.1f}{times[3]:>16.1f}{times[3] / n_years:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
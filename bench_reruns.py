@@ -0,0 +1,163 @@
+"""
+Rerun benchmark: a scripted slider drag against a real Streamlit server.
+
+Starts ``streamlit run app.py`` headless, connects over the same websocket
+protocol the browser uses, and drags the first sidebar slider through
+0 → 10 → 0 a few times at a fixed event rate (the way a browser streams
+slider values while the thumb is held). Reports how many reruns the
+server started, finished and abandoned, bytes pushed to the client, and
+the server process's CPU time.
+
+    python bench_reruns.py --events-per-sec 30 --sweeps 3
+
+Needs the ``websockets`` client (``pip install websockets``), which is not
+in requirements.txt.
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+HOST, PORT = "127.0.0.1", 8599
+_STATUS = {v: k for k, v in ForwardMsg.ScriptFinishedStatus.items()}
+
+
+def _cpu_seconds(pid):
+    """utime + stime of *pid* from /proc (Linux)."""
+    with open(f"/proc/{pid}/stat") as fh:
+        fields = fh.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+class Session:
+    def __init__(self, ws):
+        self.ws = ws
+        self.last_msg_at = time.perf_counter()
+        self.sliders = []          # (widget id, fragment id) in render order
+        self.finished = {}
+        self.bytes_in = 0
+
+    def _scan(self, msg):
+        if msg.WhichOneof("type") == "delta" and msg.delta.WhichOneof("type") == "new_element":
+            el = msg.delta.new_element
+            if el.WhichOneof("type") == "slider" and all(el.slider.id != s for s, _ in self.sliders):
+                self.sliders.append((el.slider.id, msg.delta.fragment_id))
+        elif msg.WhichOneof("type") == "script_finished":
+            status = _STATUS[msg.script_finished]
+            self.finished[status] = self.finished.get(status, 0) + 1
+            return True
+        return False
+
+    async def pump(self, until_idle=1.0, sending=None):
+        """Read forward messages until the server has been quiet for *until_idle* s.
+
+        With a *sending* event, it also waits (up to a minute) until a run
+        has finished after the last client event went out, so a server that
+        is still grinding through a long rerun is not mistaken for idle.
+        """
+        sent_at = None
+        finished_after_send = sending is None
+        while True:
+            try:
+                raw = await asyncio.wait_for(self.ws.recv(), timeout=0.1)
+            except asyncio.TimeoutError:
+                if sending is not None and not sending.is_set():
+                    continue
+                sent_at = sent_at or time.perf_counter()
+                if not finished_after_send and time.perf_counter() - sent_at < 60:
+                    continue
+                if time.perf_counter() - max(self.last_msg_at, sent_at) >= until_idle:
+                    return
+                continue
+            self.last_msg_at = time.perf_counter()
+            self.bytes_in += len(raw)
+            msg = ForwardMsg()
+            msg.ParseFromString(raw)
+            if self._scan(msg) and sent_at is not None and msg.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                finished_after_send = True
+
+    async def rerun(self, widget_states=(), fragment_id=""):
+        back = BackMsg()
+        back.rerun_script.page_script_hash = ""
+        back.rerun_script.fragment_id = fragment_id
+        back.rerun_script.widget_states.widgets.extend(widget_states)
+        await self.ws.send(back.SerializeToString())
+
+
+async def _drag(events_per_sec, sweeps, server_pid):
+    async with websockets.connect(f"ws://{HOST}:{PORT}/_stcore/stream",
+                                  subprotocols=["streamlit"], max_size=None) as ws:
+        session = Session(ws)
+        await session.rerun()
+        await session.pump(until_idle=3.0)
+        if not session.sliders:
+            sys.exit("no slider rendered")
+        slider_id, fragment_id = session.sliders[0]
+        session.finished.clear()
+        session.bytes_in = 0
+
+        values = list(range(0, 11)) + list(range(9, -1, -1))
+        values = values * sweeps
+        sent = asyncio.Event()
+        reader = asyncio.create_task(session.pump(until_idle=2.0, sending=sent))
+        cpu0, t0 = _cpu_seconds(server_pid), time.perf_counter()
+        for v in values:
+            ws_state = WidgetState(id=slider_id)
+            ws_state.double_array_value.data[:] = [v]
+            await session.rerun([ws_state], fragment_id=fragment_id)
+            await asyncio.sleep(1 / events_per_sec)
+        drag_s = time.perf_counter() - t0
+        sent.set()
+        await reader
+        settle_s = session.last_msg_at - t0
+        cpu = _cpu_seconds(server_pid) - cpu0
+
+        done = sum(n for k, n in session.finished.items() if k != "FINISHED_EARLY_FOR_RERUN")
+        print(f"slider events      {len(values)} over {drag_s:.2f}s ({len(values) / drag_s:.1f}/s)"
+              f"{'  [fragment-scoped]' if fragment_id else '  [full app]'}")
+        print(f"settled after      {settle_s:.2f}s")
+        print(f"reruns finished    {done}  ({done / settle_s:.1f}/s)")
+        print(f"reruns abandoned   {session.finished.get('FINISHED_EARLY_FOR_RERUN', 0)}")
+        print(f"server → client    {session.bytes_in / 1024:.0f} KiB")
+        print(f"server CPU         {cpu:.2f}s  ({cpu / len(values) * 1000:.1f} ms/event, "
+              f"{cpu / settle_s * 100:.0f}% of one core)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--events-per-sec", type=float, default=30)
+    parser.add_argument("--sweeps", type=int, default=3)
+    parser.add_argument("--script", default="app.py")
+    args = parser.parse_args()
+
+    server = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", args.script, "--server.headless", "true",
+         "--server.port", str(PORT), "--server.enableXsrfProtection", "false",
+         "--browser.gatherUsageStats", "false"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while True:
+            try:
+                socket.create_connection((HOST, PORT), timeout=0.2).close()
+                break
+            except OSError:
+                if server.poll() is not None:
+                    sys.exit("streamlit exited during startup")
+                time.sleep(0.2)
+        asyncio.run(_drag(args.events_per_sec, args.sweeps, server.pid))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
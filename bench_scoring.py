@@ -0,0 +1,89 @@
+"""
+Scoring benchmark: the original pandas loop vs calculate_custom_scores.
+
+Scores a typical county, the largest county and the whole state under a
+non-default profile (every metric active) in "median" missing-data mode,
+checks that the engine reproduces the reference scores exactly, and
+reports the best-of-N time per call. The "renorm ms" column is the same
+call in "renormalize" mode. Engine timings are for the whole
+calculate_custom_scores call (frame copy and final sort included); the
+reference is the bare loop. ``--scale`` tiles the statewide table to show
+how both behave on bigger inputs.
+
+    python bench_scoring.py --repeat 20 --scale 10
+"""
+import argparse
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from metrics import MISSING_COL, is_missing, read_table
+from scoring import METRIC_CONFIG, calculate_custom_scores, default_settings
+
+MASTER_PATH = "sarc_master.parquet"
+
+
+def _reference_scores(df, settings):
+    """The original per-metric pandas loop (median fill, rank, curve, accumulate)."""
+    weighted_sum = pd.Series(0.0, index=df.index)
+    total_weight = 0
+    for col, cfg in settings.items():
+        weight = cfg.get("weight", 0)
+        if weight == 0 or col not in df.columns:
+            continue
+        values = pd.to_numeric(df[col], errors="coerce").mask(is_missing(df, col))
+        median_val = values.median()
+        values = values.fillna(median_val if pd.notna(median_val) else 0)
+        metric = METRIC_CONFIG.get(col, {})
+        if metric.get("type", "linear") == "linear":
+            normalized = values.rank(pct=True)
+            if metric.get("direction") == "lower":
+                normalized = 1.0 - normalized
+        else:
+            normalized = 1.0 - (values - cfg.get("target", 50)).abs().rank(pct=True)
+        weighted_sum += normalized.clip(0, 1) ** 0.7 * weight
+        total_weight += weight
+    return (weighted_sum / total_weight * 10).round(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--scale", type=int, default=10)
+    args = parser.parse_args()
+
+    df = read_table(MASTER_PATH, columns=["County"] + list(METRIC_CONFIG) + [MISSING_COL])
+    settings = default_settings()
+    settings["SMATH_Y1"]["weight"] = 10
+    settings["PERDI"]["target"] = 50
+
+    sizes = df["County"].value_counts()
+    cases = {
+        f"county ({sizes.index[len(sizes) // 2]})": df[df["County"] == sizes.index[len(sizes) // 2]],
+        f"county ({sizes.index[0]})": df[df["County"] == sizes.index[0]],
+        "statewide": df,
+    }
+    if args.scale > 1:
+        rng = np.random.default_rng(0)
+        big = pd.concat([df] * args.scale, ignore_index=True)
+        for col in METRIC_CONFIG:
+            big[col] = big[col] + rng.normal(0, 0.05, len(big)).round(2)
+        cases[f"statewide x{args.scale}"] = big
+
+    print(f"{'case':<28}{'rows':>8}{'pandas ms':>11}{'engine ms':>11}{'renorm ms':>11}  speedup  identical")
+    for label, frame in cases.items():
+        ref = _reference_scores(frame, settings)
+        t_ref = min(timeit.repeat(lambda: _reference_scores(frame, settings),
+                                  number=1, repeat=args.repeat)) * 1000
+        got = calculate_custom_scores(frame, settings, missing="median")
+        same = got["Custom Fit Score"].sort_index().equals(ref.sort_index())
+        t = min(timeit.repeat(lambda: calculate_custom_scores(frame, settings, missing="median"),
+                              number=1, repeat=args.repeat)) * 1000
+        t_renorm = min(timeit.repeat(lambda: calculate_custom_scores(frame, settings, missing="renormalize"),
+                                     number=1, repeat=args.repeat)) * 1000
+        print(f"{label:<28}{len(frame):>8}{t_ref:>11.2f}{t:>11.2f}{t_renorm:>11.2f}{t_ref / t:>8.1f}x  {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,22 @@
-import pandas as pd
+import argparse
 import os
+import time
+
+import numpy as np
+import openpyxl
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+
+from geo import ZIP_PATH, directory_coordinates, write_zip_table
+from history import HISTORY_DIR, ID_COLS, append_year, available_years
+from metrics import (
+    MISSING_COL, is_missing, master_columns, metric_cols, missing_bits_metadata, missing_mask,
+)
+from quality import QUALITY_PATH, QualityReport
+from scoring import LEADERBOARD_PATH, write_leaderboards
+from search import SEARCH_COLS, SEARCH_PATH, write_search_index
 
 # --- COUNTY DECODER ---
 COUNTY_MAP = {
@@ -14,80 +31,480 @@ COUNTY_MAP = {
     '54': 'Tulare', '55': 'Tuolumne', '56': 'Ventura', '57': 'Yolo', '58': 'Yuba'
 }
 
-def build_sarc_master():
-    print("🚀 Starting Integrated Data Build...")
-    subfolder = 'excel_files'
-    
-    def clean_cds(series):
-        return series.apply(lambda x: str(int(float(x))).strip().zfill(14) if pd.notnull(x) and str(x).strip() != '' else '')
-
-    # 1. Load Directory
-    dir_path = os.path.join(subfolder, 'schldir.xlsx')
-    if not os.path.exists(dir_path):
-        print(f"❌ Error: {dir_path} not found!")
+MASTER_PATH = 'sarc_master.parquet'
+# Only registry metrics are read from each source and written to the master
+SCORE_COLS = metric_cols('caall')
+DNA_COLS = metric_cols('dna')
+NUMERIC_COLS = metric_cols()
+SOURCE_NAMES = ['schldir', 'caall', 'acselm', 'acssec', 'enrbysubgrp']
+# Prior years the workbooks still carry: column suffix → years before Y1
+PRIOR_YEARS = {'Y2': 1, 'Y3': 2}
+
+# Rough in-memory footprint of one object-string cell; sizes streaming chunks
+_BYTES_PER_CELL = 120
+
+
+def clean_cds(series):
+    return series.apply(lambda x: str(int(float(x))).strip().zfill(14) if pd.notnull(x) and str(x).strip() != '' else '')
+
+
+# --- SOURCE READERS ---
+# CDE publishes each SARC file as .xlsx and as tab-delimited text. Each
+# logical source is looked up in this order, and read with the fastest
+# engine installed for its format (first entry of READER_ENGINES).
+SOURCE_EXTS = ['.txt', '.tsv', '.csv', '.xlsx']
+READER_ENGINES = {
+    '.xlsx': ['calamine', 'openpyxl'],
+    '.txt': ['pyarrow', 'c'],
+    '.tsv': ['pyarrow', 'c'],
+    '.csv': ['pyarrow', 'c'],
+}
+_ENGINE_MODULES = {'calamine': 'python_calamine', 'openpyxl': 'openpyxl', 'pyarrow': 'pyarrow', 'c': None}
+
+# pandas' default NA strings, so every engine treats the same cells as missing
+_NA_VALUES = ['', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND',
+              '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null']
+
+
+def find_source(subfolder, name):
+    """Path of the first existing ``<name><ext>`` in SOURCE_EXTS order, or None."""
+    for ext in SOURCE_EXTS:
+        path = os.path.join(subfolder, name + ext)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def available_engines(path):
+    """Installed reader engines for *path*, fastest first."""
+    engines = []
+    for engine in READER_ENGINES[os.path.splitext(path)[1].lower()]:
+        module = _ENGINE_MODULES[engine]
+        if module is None:
+            engines.append(engine)
+            continue
+        try:
+            __import__(module)
+        except ImportError:
+            continue
+        engines.append(engine)
+    return engines
+
+
+def _cell_str(value):
+    """Stringify an openpyxl cell the way ``pd.read_excel(dtype=str)`` does."""
+    if value is None or value == '':
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _stream_xlsx(path, max_memory_mb):
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = wb.worksheets[0].iter_rows(values_only=True)
+        header = list(next(rows))
+        while header and header[-1] is None:
+            header.pop()
+        header = [str(c).strip().upper() for c in header]
+        chunk_rows = max(1_000, int(max_memory_mb * 2**20 / (len(header) * _BYTES_PER_CELL)))
+        buf = []
+        for row in rows:
+            cells = [_cell_str(v) for v in row[:len(header)]]
+            if all(c is None for c in cells):
+                continue
+            buf.append(cells + [None] * (len(header) - len(cells)))
+            if len(buf) >= chunk_rows:
+                yield pd.DataFrame(buf, columns=header, dtype=str)
+                buf = []
+        if buf:
+            yield pd.DataFrame(buf, columns=header, dtype=str)
+    finally:
+        wb.close()
+
+
+def _stream_text(path, max_memory_mb, sep):
+    n_cols = len(pd.read_csv(path, sep=sep, nrows=0).columns)
+    chunk_rows = max(1_000, int(max_memory_mb * 2**20 / (n_cols * _BYTES_PER_CELL)))
+    for frame in pd.read_csv(path, sep=sep, dtype=str, chunksize=chunk_rows):
+        frame.columns = [c.strip().upper() for c in frame.columns]
+        yield frame
+
+
+def _read_text_pyarrow(path, sep):
+    """Multithreaded Arrow CSV read with every column kept as a string.
+
+    ``pd.read_csv(engine='pyarrow')`` infers integer types first, which
+    strips the leading zeros from CDS codes, so the types are pinned here.
+    """
+    names = pd.read_csv(path, sep=sep, nrows=0).columns
+    table = pacsv.read_csv(
+        path,
+        parse_options=pacsv.ParseOptions(delimiter=sep),
+        convert_options=pacsv.ConvertOptions(
+            column_types={c: pa.string() for c in names},
+            null_values=_NA_VALUES, strings_can_be_null=True,
+        ),
+    )
+    return table.to_pandas()
+
+
+def read_sheet(path, max_memory_mb=None, engine=None):
+    """
+    Yield a source file as string DataFrames with upper-cased headers.
+
+    With ``max_memory_mb=None`` the whole file is read in one go using
+    *engine* (default: fastest installed for the format). Otherwise rows
+    are streamed in chunks sized so a chunk stays under roughly
+    *max_memory_mb* of object strings: openpyxl's read-only iterator for
+    workbooks, the chunked C parser for text.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    sep = ',' if ext == '.csv' else '\t'
+    if max_memory_mb is not None:
+        if ext == '.xlsx':
+            yield from _stream_xlsx(path, max_memory_mb)
+        else:
+            yield from _stream_text(path, max_memory_mb, sep)
         return
-    
-    df = pd.read_excel(dir_path, dtype=str, engine='openpyxl')
-    df.columns = [c.strip().upper() for c in df.columns]
-    df = df.rename(columns={'CDSCODE': 'CDSCode', 'DISTRICT': 'District', 'SCHOOL': 'School'})
-    df['CDSCode'] = clean_cds(df['CDSCode'])
-    df['County'] = df['C'].map(COUNTY_MAP).fillna('Unknown')
-
-    # 2. Merge Academics (caall.xlsx)
-    scores_path = os.path.join(subfolder, 'caall.xlsx')
-    if os.path.exists(scores_path):
-        print("Merging Academics...")
-        df_scores = pd.read_excel(scores_path, dtype=str, engine='openpyxl')
-        df_scores.columns = [c.strip().upper() for c in df_scores.columns]
-        df_scores['CDS_JOIN'] = clean_cds(df_scores['CDSCODE'])
-        for col in ['SMATH_Y1', 'SELA_Y1']:
-            if col in df_scores.columns:
-                df_scores[col] = pd.to_numeric(df_scores[col], errors='coerce')
-        df = pd.merge(df, df_scores[['CDS_JOIN', 'SMATH_Y1', 'SELA_Y1']], left_on='CDSCode', right_on='CDS_JOIN', how='left')
-
-    # 3. Merge Class Size (acselm.xlsx and acssec.xlsx)
-    class_dfs = []
-    for f_name in ['acselm.xlsx', 'acssec.xlsx']:
-        f_path = os.path.join(subfolder, f_name)
-        if os.path.exists(f_path):
-            print(f"Merging Class Size: {f_name}...")
-            temp_df = pd.read_excel(f_path, dtype=str, engine='openpyxl')
-            temp_df.columns = [c.strip().upper() for c in temp_df.columns]
-            temp_df['CDS_JOIN_CLASS'] = clean_cds(temp_df['CDSCODE'])
-            avg_cols = [c for c in temp_df.columns if c.startswith('AVG') and c.endswith('Y1')]
-            for c in avg_cols:
-                temp_df[c] = pd.to_numeric(temp_df[c], errors='coerce')
-            temp_df['ROW_AVG'] = temp_df[avg_cols].mean(axis=1)
-            agg = temp_df.groupby('CDS_JOIN_CLASS')['ROW_AVG'].mean().reset_index()
-            class_dfs.append(agg)
-
-    if class_dfs:
-        all_class = pd.concat(class_dfs).groupby('CDS_JOIN_CLASS')['ROW_AVG'].mean().reset_index()
+
+    engine = engine or available_engines(path)[0]
+    if ext == '.xlsx':
+        frame = pd.read_excel(path, dtype=str, engine=engine)
+    elif engine == 'pyarrow':
+        frame = _read_text_pyarrow(path, sep)
+    else:
+        frame = pd.read_csv(path, sep=sep, dtype=str, engine=engine)
+    frame.columns = [c.strip().upper() for c in frame.columns]
+    yield frame
+
+
+def compare_readers(subfolder='excel_files'):
+    """Time every installed engine on every source and check the results match."""
+    print(f"{'source':<18}{'engine':<10}{'seconds':>8}  identical")
+    for name in SOURCE_NAMES:
+        path = find_source(subfolder, name)
+        if path is None:
+            continue
+        reference = None
+        for engine in available_engines(path):
+            start = time.perf_counter()
+            frame = next(read_sheet(path, engine=engine))
+            elapsed = time.perf_counter() - start
+            same = True if reference is None else frame.equals(reference)
+            reference = frame if reference is None else reference
+            print(f"{os.path.basename(path):<18}{engine:<10}{elapsed:>8.2f}  {same}")
+
+
+# --- SOURCE STAGES ---
+def _prep_directory(frame):
+    frame = frame.rename(columns={'CDSCODE': 'CDSCode', 'DISTRICT': 'District', 'SCHOOL': 'School'})
+    frame['CDSCode'] = clean_cds(frame['CDSCode'])
+    frame['County'] = frame['C'].map(COUNTY_MAP).fillna('Unknown')
+    coords = directory_coordinates(frame)
+    frame['LAT'], frame['LON'] = coords['LAT'], coords['LON']
+    return frame
+
+
+def _year_col(col, suffix):
+    """Source column of *col* for the year ending *suffix* ('SMATH_Y1', 'Y2' → 'SMATH_Y2')."""
+    return col[:-2] + suffix if col.endswith('Y1') else col
+
+
+def _load_scores(path, max_memory_mb, report, suffix='Y1'):
+    parts = []
+    for chunk in read_sheet(path, max_memory_mb):
+        chunk['CDS_JOIN'] = clean_cds(chunk['CDSCODE'])
+        # Prior-year columns come back under their registry (_Y1) names
+        present = [c for c in SCORE_COLS if _year_col(c, suffix) in chunk.columns]
+        for col in present:
+            chunk[col] = pd.to_numeric(chunk[_year_col(col, suffix)], errors='coerce')
+        parts.append(chunk[['CDS_JOIN'] + present])
+    scores = pd.concat(parts, ignore_index=True)
+    if report is not None:
+        report.check_source('caall', scores['CDS_JOIN'])
+    return scores
+
+
+def _numeric_matrix(frame, cols):
+    """Coerce *cols* of a string frame to one float64 matrix (missing → NaN)."""
+    block = frame.reindex(columns=cols)
+    try:
+        return block.astype(float).to_numpy()
+    except (TypeError, ValueError):
+        # Stray non-numeric cells: coerce the whole block in one call
+        raw = block.to_numpy(dtype=object)
+        return pd.to_numeric(raw.ravel(), errors='coerce').astype(float).reshape(raw.shape)
+
+
+def _segment_sum(keys, *values):
+    """Sum each of *values* per distinct key: (unique keys, [sums...])."""
+    codes, uniques = pd.factorize(keys)
+    return uniques, [np.bincount(codes, weights=v, minlength=len(uniques)) for v in values]
+
+
+def _class_size_terms(chunk, weighted, suffix='Y1'):
+    """
+    Per-row (weighted sum, weight) of class size for one acselm/acssec chunk.
+
+    Unweighted, a row contributes its mean AVG*Y1 value with weight 1.
+    Weighted, each AVG<x>_Y1 cell is weighted by its section count
+    NCS<x>_Y1 + NCM<x>_Y1 + NCL<x>_Y1, so grades/subjects with no classes
+    (reported as 0) drop out and big grades count for more. *suffix*
+    selects a prior year's columns instead (Y2, Y3).
+    """
+    avg_cols = [c for c in chunk.columns if c.startswith('AVG') and c.endswith(suffix)]
+    avg = _numeric_matrix(chunk, avg_cols)
+    valid = ~np.isnan(avg)
+    avg = np.where(valid, avg, 0.0)
+    if weighted:
+        suffixes = [c[3:] for c in avg_cols]
+        nc_cols = [f'NC{size}{x}' for size in 'SML' for x in suffixes]
+        sections = _numeric_matrix(chunk, nc_cols).reshape(len(chunk), 3, len(avg_cols))
+        w = np.where(valid, np.nan_to_num(sections).sum(axis=1), 0.0)
+        return (avg * w).sum(axis=1), w.sum(axis=1)
+    n = valid.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        row_mean = avg.sum(axis=1) / n
+    has = n > 0
+    return np.where(has, row_mean, 0.0), has.astype(float)
+
+
+def _load_class_sizes(paths, max_memory_mb, weighted=False, report=None, suffix='Y1'):
+    """
+    Per-CDS class size from the elementary and secondary tables.
+
+    Unweighted (default): mean of row means per file, then mean across
+    files. Weighted: total students-in-class over total sections, pooled
+    across both files. Each file keeps a running (sum, weight) per CDS, and
+    the files are combined with one segment reduction. With *report*, each
+    file's raw CDS keys are checked for duplicates before they are reduced.
+    *suffix* selects the year, as in _class_size_terms.
+    """
+    keys, sums, weights = [], [], []
+    for f_path in paths:
+        f_keys, f_sum, f_w, raw_keys = [], [], [], []
+        for chunk in read_sheet(f_path, max_memory_mb):
+            row_sum, row_w = _class_size_terms(chunk, weighted, suffix)
+            cds = clean_cds(chunk['CDSCODE']).to_numpy()
+            raw_keys.append(cds)
+            k, (cs, cw) = _segment_sum(cds, row_sum, row_w)
+            f_keys.append(k)
+            f_sum.append(cs)
+            f_w.append(cw)
+        if not f_keys:
+            continue
+        if report is not None:
+            report.check_source('class_size', np.concatenate(raw_keys))
+        k, (fs, fw) = _segment_sum(np.concatenate(f_keys), np.concatenate(f_sum), np.concatenate(f_w))
+        if not weighted:
+            # Collapse to one mean per (file, CDS) so each file counts once
+            with np.errstate(invalid='ignore', divide='ignore'):
+                fs = np.where(fw > 0, fs / fw, 0.0)
+            fw = (fw > 0).astype(float)
+        keys.append(k)
+        sums.append(fs)
+        weights.append(fw)
+    if not keys:
+        return None
+    k, (total, weight) = _segment_sum(np.concatenate(keys), np.concatenate(sums), np.concatenate(weights))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        avg_size = np.where(weight > 0, total / weight, np.nan)
+    return pd.DataFrame({'CDS_JOIN_CLASS': k, 'ROW_AVG': avg_size})
+
+
+def _load_dna(path, max_memory_mb, report):
+    parts = []
+    for chunk in read_sheet(path, max_memory_mb):
+        report.check_shares(chunk)
+        chunk['CDS_JOIN_DNA'] = clean_cds(chunk['CDSCODE'])
+        present = [c for c in DNA_COLS if c in chunk.columns]
+        for c in present:
+            # Blank / suppressed cells stay NaN so _merge_sources flags them
+            chunk[c] = pd.to_numeric(chunk[c], errors='coerce')
+        parts.append(chunk[['CDS_JOIN_DNA'] + present])
+    dna = pd.concat(parts, ignore_index=True)
+    report.check_source('enrbysubgrp', dna['CDS_JOIN_DNA'])
+    return dna
+
+
+# Join column each source's merge adds (non-null = directory row matched)
+_JOIN_KEYS = {'caall': 'CDS_JOIN', 'class_size': 'CDS_JOIN_CLASS', 'enrbysubgrp': 'CDS_JOIN_DNA'}
+
+
+def _merge_sources(df, scores, all_class, dna, report):
+    if scores is not None:
+        df = pd.merge(df, scores, left_on='CDSCode', right_on='CDS_JOIN', how='left')
+    if all_class is not None:
         df = pd.merge(df, all_class, left_on='CDSCode', right_on='CDS_JOIN_CLASS', how='left')
         df = df.rename(columns={'ROW_AVG': 'AVG_SIZE'})
+    if dna is not None:
+        df = pd.merge(df, dna, left_on='CDSCode', right_on='CDS_JOIN_DNA', how='left')
 
-    # 4. Merge Demographic DNA (enrbysubgrp.xlsx)
-    dna_path = os.path.join(subfolder, 'enrbysubgrp.xlsx')
-    dna_cols = ['PERGF','PERGM','PERGX','PERAI','PERAS','PERAA','PERFI','PERHI','PERPI','PERMULTI','PERWH','PEREL','PERSD','PERDI']
-    if os.path.exists(dna_path):
-        print("Merging Demographic DNA Profile...")
-        df_dna = pd.read_excel(dna_path, dtype=str, engine='openpyxl')
-        df_dna.columns = [c.strip().upper() for c in df_dna.columns]
-        df_dna['CDS_JOIN_DNA'] = clean_cds(df_dna['CDSCODE'])
-        for c in dna_cols:
-            if c in df_dna.columns:
-                df_dna[c] = pd.to_numeric(df_dna[c], errors='coerce').fillna(0)
-        df = pd.merge(df, df_dna[['CDS_JOIN_DNA'] + [c for c in dna_cols if c in df_dna.columns]], 
-                      left_on='CDSCode', right_on='CDS_JOIN_DNA', how='left')
-
-    # Final Cleanup
-    numeric_cols = ['SMATH_Y1', 'SELA_Y1', 'AVG_SIZE'] + dna_cols
-    for col in numeric_cols:
+    # Final Cleanup: record which metrics had no source value before the
+    # 0 fill, so scoring can still tell "missing" from a real 0
+    df[MISSING_COL] = missing_mask(df)
+    for col in NUMERIC_COLS:
         if col in df.columns:
             df[col] = df[col].fillna(0)
+    if report is not None:
+        report.check_merged(df, _JOIN_KEYS)
+    # Drop join keys and directory fields no registered consumer reads
+    return df[[c for c in master_columns() if c in df.columns]]
+
+
+def _prior_year(year, back):
+    """SARC year *back* years before *year* ('2024-25', 1 → '2023-24')."""
+    start = int(str(year)[:4]) - back
+    return f"{start}-{(start + 1) % 100:02d}"
+
+
+def backfill_history(df, scores_path, class_paths, max_memory_mb=None, weight_class_size=False):
+    """
+    Seed the history store with the prior years the workbooks carry.
+
+    caall has _Y2 scores and acselm / acssec have _Y2 and _Y3 class sizes;
+    each such year not yet in the store is built for the current
+    directory's schools and appended. enrbysubgrp has no prior years, so
+    those metrics are absent (NaN) in the backfilled partitions. Years
+    already stored, e.g. by that year's own build, are left alone.
+
+    Returns
+    -------
+    list[str]  –  the years written.
+    """
+    year = df['SARCYEAR'].mode().iloc[0]
+    stored = set(available_years())
+    ids = df[ID_COLS].drop_duplicates('CDSCode')
+    written = []
+    for suffix, back in PRIOR_YEARS.items():
+        prior = _prior_year(year, back)
+        if prior in stored:
+            continue
+        scores = _load_scores(scores_path, max_memory_mb, None, suffix) if scores_path else None
+        all_class = _load_class_sizes(class_paths, max_memory_mb, weighted=weight_class_size, suffix=suffix)
+        merged = _merge_sources(ids, scores, all_class, None, None)
+        if all(is_missing(merged, c).all() for c in metric_cols() if c in merged.columns):
+            continue
+        append_year(merged, year=prior)
+        written.append(prior)
+    return written
+
+
+def build_sarc_master(max_memory_mb=None, weight_class_size=False):
+    """
+    Merge the CDE workbooks into ``sarc_master.parquet``.
+
+    Parameters
+    ----------
+    max_memory_mb : float, optional
+        Streaming mode: read every workbook in row chunks of about this
+        many MB and write the master file one Parquet row group per
+        directory chunk. ``None`` loads each workbook whole (default).
+    weight_class_size : bool
+        Weight each grade/subject average by its section count instead of
+        averaging the averages.
+    """
+    print("🚀 Starting Integrated Data Build...")
+    if max_memory_mb is not None:
+        print(f"Streaming mode: ~{max_memory_mb:g} MB per chunk.")
+    subfolder = 'excel_files'
+    report = QualityReport()
+
+    # 1. Locate Directory
+    dir_path = find_source(subfolder, 'schldir')
+    if dir_path is None:
+        print(f"❌ Error: {os.path.join(subfolder, 'schldir')}.xlsx/.txt/.csv not found!")
+        return
+
+    # 2. Academics (caall)
+    scores = None
+    scores_path = find_source(subfolder, 'caall') if SCORE_COLS else None
+    if scores_path:
+        print(f"Merging Academics: {os.path.basename(scores_path)}...")
+        scores = _load_scores(scores_path, max_memory_mb, report)
+
+    # 3. Class Size (acselm and acssec)
+    class_paths = []
+    for name in ['acselm', 'acssec'] if metric_cols('class_size') else []:
+        f_path = find_source(subfolder, name)
+        if f_path:
+            print(f"Merging Class Size: {os.path.basename(f_path)}...")
+            class_paths.append(f_path)
+    all_class = _load_class_sizes(class_paths, max_memory_mb, weighted=weight_class_size, report=report)
+
+    # 4. Demographic DNA (enrbysubgrp)
+    dna = None
+    dna_path = find_source(subfolder, 'enrbysubgrp') if DNA_COLS else None
+    if dna_path:
+        print(f"Merging Demographic DNA Profile: {os.path.basename(dna_path)}...")
+        dna = _load_dna(dna_path, max_memory_mb, report)
+
+    # Directory is streamed last: each chunk is merged against the small
+    # per-CDS lookups above and appended to the Parquet file as a row group.
+    writer = None
+    try:
+        for chunk in read_sheet(dir_path, max_memory_mb):
+            merged = _merge_sources(_prep_directory(chunk), scores, all_class, dna, report)
+            table = pa.Table.from_pandas(merged, preserve_index=False,
+                                         schema=writer.schema if writer else None)
+            if writer is None:
+                # Record MISSING_COL's bit order with the file
+                schema = table.schema.with_metadata({**table.schema.metadata, **missing_bits_metadata()})
+                writer = pq.ParquetWriter(MASTER_PATH, schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+    print(f"✅ SUCCESS: '{MASTER_PATH}' generated with all Integrated Metrics.")
+
+    # Data quality report (counts gathered during the merge above)
+    print("Data quality:")
+    for line in report.lines():
+        print(f"   {line}")
+    report.write()
+    print(f"✅ SUCCESS: '{QUALITY_PATH}' written.")
+
+    # Downstream stages only need identity + metric columns
+    keep = ['CDSCode', 'County', 'District', 'School', 'SARCYEAR'] + NUMERIC_COLS + [MISSING_COL]
+    df = pd.read_parquet(MASTER_PATH, columns=keep)
+
+    # 5. Precompute default-profile leaderboards (first render is a lookup)
+    print("Precomputing default leaderboards...")
+    write_leaderboards(df)
+    print(f"✅ SUCCESS: '{LEADERBOARD_PATH}' generated for {df['County'].nunique()} counties.")
+
+    # 6. Append this year to the multi-year history store
+    year = append_year(df)
+    print(f"✅ SUCCESS: {year} written to '{HISTORY_DIR}/' (other years untouched).")
+    backfilled = backfill_history(df, scores_path, class_paths, max_memory_mb, weight_class_size)
+    if backfilled:
+        print(f"✅ SUCCESS: prior years {', '.join(backfilled)} backfilled from the _Y2/_Y3 columns.")
+
+    # 7. Statewide search index (trigram postings for names and cities)
+    n = write_search_index(pd.read_parquet(MASTER_PATH, columns=SEARCH_COLS))
+    print(f"✅ SUCCESS: '{SEARCH_PATH}' indexed {n} schools and districts.")
+
+    # 8. ZIP centroids for the dashboard's "near" box
+    n = write_zip_table()
+    if n:
+        print(f"✅ SUCCESS: '{ZIP_PATH}' holds {n} ZIP centroids.")
+    else:
+        print("Skipping ZIP table: zipcodes not installed (schools are placed by directory coordinates only).")
 
-    df.to_parquet('sarc_master.parquet', index=False)
-    print("✅ SUCCESS: 'sarc_master.parquet' generated with all Integrated Metrics.")
 
 if __name__ == "__main__":
-    build_sarc_master()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Build sarc_master.parquet from the CDE workbooks.")
+    parser.add_argument("--max-memory-mb", type=float, default=None,
+                        help="stream workbooks in chunks of about this many MB (bounded-memory build)")
+    parser.add_argument("--weight-class-size", action="store_true",
+                        help="weight class-size averages by section counts")
+    parser.add_argument("--compare-readers", action="store_true",
+                        help="time each installed reader engine per source and exit")
+    args = parser.parse_args()
+    if args.compare_readers:
+        compare_readers()
+    else:
+        build_sarc_master(max_memory_mb=args.max_memory_mb,
+                          weight_class_size=args.weight_class_size)
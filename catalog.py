@@ -0,0 +1,32 @@
+# ─── SCHOOL CATALOG ────────────────────────────────────────────────────
+# County → sorted districts → sorted schools, built once per data version
+# so the selection dropdowns never scan or sort the master table.
+
+
+class SchoolIndex:
+    """
+    Hierarchical, pre-sorted name index over the master table.
+
+    Lookups (`counties`, `districts`, `schools`) return prebuilt lists in
+    O(1). Name search lives in search.SearchIndex.
+    """
+
+    def __init__(self, tree):
+        self._tree = tree
+        self.counties = sorted(tree)
+        self._districts = {c: sorted(tree[c]) for c in self.counties}
+
+    @classmethod
+    def from_frame(cls, df):
+        """Build from a frame with County / District / School columns."""
+        tree = {}
+        pairs = df[["County", "District", "School"]].dropna().drop_duplicates()
+        for (county, district), grp in pairs.groupby(["County", "District"], sort=False):
+            tree.setdefault(county, {})[district] = sorted(grp["School"])
+        return cls(tree)
+
+    def districts(self, county):
+        return self._districts.get(county, [])
+
+    def schools(self, county, district):
+        return self._tree.get(county, {}).get(district, [])
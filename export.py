@@ -0,0 +1,174 @@
+"""
+Chunked export of scored rankings to CSV, Parquet or Excel.
+
+The dashboard's export button and this CLI share one writer that walks an
+already-scored frame EXPORT_CHUNK_ROWS rows at a time instead of building
+a second full DataFrame (or a Styler) of the export columns. The CLI
+streams those chunks to disk; the dashboard's download button needs the
+whole file as bytes, so export_bytes holds the finished file in memory.
+
+    python export.py --county "San Diego" --level District --format xlsx -o sd.xlsx
+    python export.py --format parquet -o statewide.parquet --weight SMATH_Y1=10 --target PERDI=Mixed
+    python export.py --near 94612 --miles 10 -o oakland.csv
+"""
+import argparse
+import io
+
+import openpyxl
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from geo import GeoIndex, nearby, read_zip_table
+from metrics import MISSING_COL, read_table
+from scoring import METRIC_CONFIG, default_settings, rank_districts, rank_schools
+
+MASTER_PATH = "sarc_master.parquet"
+EXPORT_CHUNK_ROWS = 2000
+
+# extension → MIME type for the download button
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+_ID_COLS = {
+    "School": ["CDSCode", "County", "District", "School"],
+    "District": ["County", "District"],
+}
+
+
+def export_columns(ranked, level):
+    """Rank, score, identity and metric columns present in *ranked*, in order."""
+    cols = ["_rank", "Custom Fit Score"] + _ID_COLS[level] + ["Miles"] + list(METRIC_CONFIG)
+    return [c for c in cols if c in ranked.columns]
+
+
+def _chunks(ranked, cols, chunk_rows):
+    for start in range(0, len(ranked), chunk_rows):
+        yield ranked.iloc[start:start + chunk_rows][cols].rename(columns={"_rank": "Rank"})
+
+
+def write_export(ranked, fmt, dest, level="School", chunk_rows=EXPORT_CHUNK_ROWS):
+    """
+    Write a ranked frame to *dest* chunk by chunk.
+
+    Parameters
+    ----------
+    ranked : pd.DataFrame
+        Output of rank_schools / rank_districts (or a leaderboard slice),
+        already in rank order.
+    fmt : {"csv", "parquet", "xlsx"}
+    dest : str or binary file object
+    level : {"School", "District"}
+        Picks the identity columns.
+
+    Returns
+    -------
+    int  –  rows written.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"format must be one of {list(EXPORT_FORMATS)}")
+    cols = export_columns(ranked, level)
+    chunks = _chunks(ranked, cols, chunk_rows)
+
+    if fmt == "csv":
+        fh = open(dest, "wb") if isinstance(dest, str) else dest
+        try:
+            for i, chunk in enumerate(chunks):
+                fh.write(chunk.to_csv(index=False, header=i == 0).encode("utf-8"))
+        finally:
+            if fh is not dest:
+                fh.close()
+    elif fmt == "parquet":
+        # One row group per chunk
+        writer = None
+        try:
+            for chunk in chunks:
+                table = pa.Table.from_pandas(chunk, preserve_index=False,
+                                             schema=writer.schema if writer else None)
+                if writer is None:
+                    writer = pq.ParquetWriter(dest, table.schema)
+                writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
+    else:
+        # write_only workbooks stream rows to a temp file instead of
+        # keeping a cell object per value
+        wb = openpyxl.Workbook(write_only=True)
+        ws = wb.create_sheet(f"{level} Rankings")
+        ws.append(["Rank" if c == "_rank" else c for c in cols])
+        for chunk in chunks:
+            for row in chunk.astype(object).where(chunk.notna(), None).itertuples(index=False):
+                ws.append(list(row))
+        wb.save(dest)
+    return len(ranked)
+
+
+def export_bytes(ranked, fmt, level="School"):
+    """
+    Whole export as bytes (for st.download_button). The encoded file is
+    buffered in memory, so this costs one file's size on top of *ranked*.
+    """
+    buf = io.BytesIO()
+    write_export(ranked, fmt, buf, level=level)
+    return buf.getvalue()
+
+
+# ─── CLI ───────────────────────────────────────────────────────────────
+def _parse_settings(weights, targets):
+    settings = default_settings()
+    for item in weights:
+        col, _, w = item.partition("=")
+        if col not in METRIC_CONFIG:
+            raise SystemExit(f"unknown metric {col!r}")
+        settings[col]["weight"] = float(w)
+    for item in targets:
+        col, _, opt = item.partition("=")
+        cfg = METRIC_CONFIG.get(col)
+        if cfg is None or cfg["type"] != "target" or opt not in cfg["options"]:
+            raise SystemExit(f"bad target {item!r}")
+        settings[col]["target"] = cfg["options"][opt]
+    return settings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--county", help="county to rank within (default: statewide)")
+    parser.add_argument("--near", metavar="PLACE",
+                        help="rank schools near a ZIP, city, address or CDS code instead")
+    parser.add_argument("--miles", type=float, default=10.0, help="radius for --near")
+    parser.add_argument("--nearest", type=int, metavar="K",
+                        help="with --near: keep only the K nearest schools")
+    parser.add_argument("--level", choices=list(_ID_COLS), default="School")
+    parser.add_argument("--format", choices=list(EXPORT_FORMATS), default="csv")
+    parser.add_argument("-o", "--output", required=True)
+    parser.add_argument("--weight", action="append", default=[], metavar="COL=N")
+    parser.add_argument("--target", action="append", default=[], metavar="COL=OPTION")
+    args = parser.parse_args()
+
+    settings = _parse_settings(args.weight, args.target)
+    cols = ["CDSCode", "County", "District", "School"] + list(METRIC_CONFIG) + [MISSING_COL]
+    if args.near:
+        df = read_table(MASTER_PATH, columns=cols + ["CITY", "LAT", "LON"])
+        index = GeoIndex.from_frame(df, zips=read_zip_table())
+        point = index.locate(args.near)
+        if point is None:
+            raise SystemExit(f"can't place {args.near!r} (try a ZIP, city or CDS code)")
+        df = nearby(df, index, *point, miles=args.miles, k=args.nearest)
+    else:
+        filters = [("County", "==", args.county)] if args.county else None
+        df = read_table(MASTER_PATH, columns=cols, filters=filters)
+    if df.empty:
+        raise SystemExit(f"no schools for {args.near or args.county!r}")
+    ranked = rank_schools(df, settings)
+    if args.level == "District":
+        # Keyed by (County, District): same-named districts stay apart statewide
+        ranked = rank_districts(ranked)
+    n = write_export(ranked, args.format, args.output, level=args.level)
+    print(f"✅ {n} {args.level.lower()} rows written to '{args.output}'.")
+
+
+if __name__ == "__main__":
+    main()
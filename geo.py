@@ -0,0 +1,249 @@
+import os
+import re
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+try:
+    import zipcodes  # bundled USPS ZIP centroids, no network needed
+except ImportError:
+    zipcodes = None
+
+# ─── GEOSPATIAL INDEX ──────────────────────────────────────────────────
+# School coordinates live in the master table's LAT / LON columns. The
+# builder takes them from the directory's Latitude / Longitude columns
+# when present, otherwise from the school's ZIP centroid (needs the
+# optional `zipcodes` package), so nearby schools may share a point.
+# GeoIndex buckets them into a uniform lat/lon grid once per data
+# version; radius and nearest-K queries only measure great-circle
+# distance to the schools in the grid cells the query can reach. The
+# builder also writes the state's ZIP centroids so the dashboard can
+# place a typed ZIP without the package.
+ZIP_PATH = "sarc_zips.parquet"
+EARTH_RADIUS_MI = 3958.8
+# Grid cell edge in degrees (~7 miles north-south)
+GRID_DEG = 0.1
+# Miles per degree of latitude
+_MI_PER_DEG = np.pi / 180 * EARTH_RADIUS_MI
+
+_ZIP = re.compile(r"\b(\d{5})(?:-\d{4})?\b")
+_CDS = re.compile(r"^\d{14}$")
+
+
+def haversine_mi(lat, lon, lats, lons):
+    """Great-circle miles from (*lat*, *lon*) to each of *lats* / *lons*."""
+    lat, lon = np.radians(lat), np.radians(lon)
+    lats, lons = np.radians(lats), np.radians(lons)
+    a = (np.sin((lats - lat) / 2) ** 2
+         + np.cos(lat) * np.cos(lats) * np.sin((lons - lon) / 2) ** 2)
+    return 2 * EARTH_RADIUS_MI * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+@lru_cache(maxsize=1)
+def _all_zips():
+    """
+    LAT / LON / STATE per 5-digit ZIP from `zipcodes` (empty without it).
+
+    Loading it costs about a second and 160 MB, so only the builder calls
+    this; the dashboard reads the small table write_zip_table leaves.
+    """
+    rows = [] if zipcodes is None else zipcodes.list_all()
+    table = pd.DataFrame([(z["zip_code"], z["lat"], z["long"], z["state"]) for z in rows],
+                         columns=["ZIP", "LAT", "LON", "STATE"]).set_index("ZIP")
+    table[["LAT", "LON"]] = table[["LAT", "LON"]].apply(pd.to_numeric, errors="coerce")
+    table = table.dropna()
+    # A few entries carry a (0, 0) placeholder
+    return table[(table["LAT"] != 0) & (table["LON"] != 0)]
+
+
+def write_zip_table(states=("CA",), path=ZIP_PATH):
+    """Write the ZIP centroids of *states* for GeoIndex.locate; returns the count."""
+    table = _all_zips()
+    table = table[table["STATE"].isin(states)][["LAT", "LON"]].reset_index()
+    table.to_parquet(path, index=False)
+    return len(table)
+
+
+def read_zip_table(path=ZIP_PATH):
+    """ZIP → (lat, lon) from write_zip_table's file ({} until it exists)."""
+    if not os.path.exists(path):
+        return {}
+    table = pd.read_parquet(path)
+    return dict(zip(table["ZIP"], zip(table["LAT"], table["LON"])))
+
+
+def directory_coordinates(frame):
+    """
+    LAT / LON for one school-directory chunk.
+
+    Uses the directory's own Latitude / Longitude columns when it has them
+    and falls back to ZIP centroids per row. Rows that can't be placed get
+    NaN.
+
+    Returns
+    -------
+    pd.DataFrame  –  LAT and LON float columns aligned to *frame*.
+    """
+    cols = {c.upper(): c for c in frame.columns}
+    lat = pd.Series(np.nan, index=frame.index)
+    lon = pd.Series(np.nan, index=frame.index)
+    if "LATITUDE" in cols and "LONGITUDE" in cols:
+        lat = pd.to_numeric(frame[cols["LATITUDE"]], errors="coerce")
+        lon = pd.to_numeric(frame[cols["LONGITUDE"]], errors="coerce")
+    if "ZIP" in cols and not _all_zips().empty:
+        todo = (lat.isna() | lon.isna()).to_numpy()
+        zips = frame.loc[todo, cols["ZIP"]].astype(str).str[:5]
+        points = _all_zips().reindex(zips.to_numpy())
+        lat[todo] = points["LAT"].to_numpy()
+        lon[todo] = points["LON"].to_numpy()
+    return pd.DataFrame({"LAT": lat.astype(float), "LON": lon.astype(float)})
+
+
+class GeoIndex:
+    """
+    Uniform-grid spatial index over the schools of one master table.
+
+    Query results are row positions into the frame the index was built
+    from (``df.iloc[pos]``), so they feed straight into rank_schools.
+    Rows without coordinates are never returned.
+    """
+
+    def __init__(self, lat, lon, cds=None, city=None, zips=None):
+        lat = np.asarray(lat, dtype=float)
+        lon = np.asarray(lon, dtype=float)
+        pos = np.flatnonzero(np.isfinite(lat) & np.isfinite(lon))
+        self._lat0 = float(lat[pos].min()) if len(pos) else 0.0
+        self._lon0 = float(lon[pos].min()) if len(pos) else 0.0
+        rows, cols = self._cell(lat[pos], lon[pos])
+        self._n_cols = int(cols.max()) + 1 if len(pos) else 1
+        keys = rows * self._n_cols + cols
+        order = np.argsort(keys, kind="stable")
+        # Points sorted by cell key; a cell is a searchsorted slice
+        self._keys = keys[order]
+        self._pos = pos[order]
+        self._lat = lat[self._pos]
+        self._lon = lon[self._pos]
+        self._n_rows = int(rows.max()) + 1 if len(pos) else 1
+        self.size = len(pos)
+
+        self._cds = {}
+        if cds is not None:
+            cds = np.asarray(cds, dtype=object)
+            self._cds = {c: (lat[i], lon[i]) for i, c in zip(pos, cds[pos])}
+        self._zips = zips or {}
+        self._cities = {}
+        if city is not None:
+            city = pd.Series(np.asarray(city, dtype=object)[pos]).fillna("").str.casefold().str.strip()
+            pts = pd.DataFrame({"city": city, "lat": lat[pos], "lon": lon[pos]})
+            means = pts[pts["city"] != ""].groupby("city")[["lat", "lon"]].mean()
+            self._cities = {c: (r.lat, r.lon) for c, r in means.iterrows()}
+
+    @classmethod
+    def from_frame(cls, df, zips=None):
+        """
+        Build from a master frame with LAT / LON (and CDSCode / CITY).
+
+        *zips* (ZIP → (lat, lon), see read_zip_table) lets `locate` place
+        ZIP codes.
+        """
+        if "LAT" not in df.columns or "LON" not in df.columns:
+            return cls([], [])
+        return cls(df["LAT"], df["LON"],
+                   cds=df["CDSCode"] if "CDSCode" in df.columns else None,
+                   city=df["CITY"] if "CITY" in df.columns else None,
+                   zips=zips)
+
+    def _cell(self, lat, lon):
+        rows = np.floor((np.asarray(lat) - self._lat0) / GRID_DEG).astype(np.int64)
+        cols = np.floor((np.asarray(lon) - self._lon0) / GRID_DEG).astype(np.int64)
+        return rows, cols
+
+    def _candidates(self, lat, lon, miles):
+        """Index slots of every point in the cells a *miles* circle can touch."""
+        dlat = miles / _MI_PER_DEG
+        # Longitude degrees shrink with latitude; use the circle's widest row
+        widest = min(abs(lat) + dlat, 89.9)
+        dlon = miles / (_MI_PER_DEG * np.cos(np.radians(widest)))
+        (r0, r1), (c0, c1) = self._cell([lat - dlat, lat + dlat], [lon - dlon, lon + dlon])
+        r0, r1 = max(r0, 0), min(r1, self._n_rows - 1)
+        c0, c1 = max(c0, 0), min(c1, self._n_cols - 1)
+        if r0 > r1 or c0 > c1:
+            return np.array([], dtype=np.int64)
+        # One contiguous key range per grid row of the bounding box
+        base = np.arange(r0, r1 + 1) * self._n_cols
+        starts = np.searchsorted(self._keys, base + c0, side="left")
+        ends = np.searchsorted(self._keys, base + c1, side="right")
+        spans = [np.arange(s, e) for s, e in zip(starts, ends) if e > s]
+        return np.concatenate(spans) if spans else np.array([], dtype=np.int64)
+
+    def within(self, lat, lon, miles):
+        """
+        Schools within *miles* of (*lat*, *lon*), nearest first.
+
+        Returns
+        -------
+        (np.ndarray, np.ndarray)  –  row positions and their distances in miles.
+        """
+        slots = self._candidates(lat, lon, miles)
+        dist = haversine_mi(lat, lon, self._lat[slots], self._lon[slots])
+        keep = dist <= miles
+        slots, dist = slots[keep], dist[keep]
+        order = np.lexsort((self._pos[slots], dist))
+        return self._pos[slots[order]], dist[order]
+
+    def nearest(self, lat, lon, k):
+        """
+        The *k* schools nearest (*lat*, *lon*), nearest first.
+
+        Widens a radius search until it holds *k* schools, so only the
+        cells around the point are measured.
+
+        Returns
+        -------
+        (np.ndarray, np.ndarray)  –  row positions and their distances in miles.
+        """
+        k = min(k, self.size)
+        miles = GRID_DEG * _MI_PER_DEG
+        while True:
+            pos, dist = self.within(lat, lon, miles)
+            if len(pos) >= k or miles > 2 * np.pi * EARTH_RADIUS_MI:
+                return pos[:k], dist[:k]
+            miles *= 2
+
+    def locate(self, text):
+        """
+        (lat, lon) for a 14-digit CDS code, a 5-digit ZIP (also inside a
+        street address) or a city name; None when none of those match.
+        """
+        text = str(text).strip()
+        if _CDS.match(text):
+            return self._cds.get(text)
+        zip_match = _ZIP.search(text)
+        if zip_match and zip_match.group(1) in self._zips:
+            return self._zips[zip_match.group(1)]
+        city = text.split(",")[0].casefold().strip()
+        return self._cities.get(city)
+
+
+def nearby(df, index, lat, lon, miles=None, k=None):
+    """
+    Rows of *df* near (*lat*, *lon*), nearest first, ready for rank_schools.
+
+    Pass *miles* for a radius filter, *k* for the k nearest, or both for
+    the k nearest inside the radius. *index* must have been built from
+    *df*.
+
+    Returns
+    -------
+    pd.DataFrame  –  the matching rows with a 'Miles' column.
+    """
+    if miles is None and k is None:
+        raise ValueError("pass miles, k or both")
+    if miles is not None:
+        pos, dist = index.within(lat, lon, miles)
+        if k is not None:
+            pos, dist = pos[:k], dist[:k]
+    else:
+        pos, dist = index.nearest(lat, lon, k)
+    return df.iloc[pos].assign(Miles=dist.round(1))
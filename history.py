@@ -0,0 +1,215 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from metrics import METRIC_CONFIG, MISSING_COL, metric_bit, missing_bits_metadata, stored_bits
+
+# ─── HISTORY STORE ─────────────────────────────────────────────────────
+# One hive partition per SARC year (sarc_history/YEAR=2024-25/...), keyed
+# by CDSCode inside each partition. Rebuilding a year only rewrites that
+# year's partition, so earlier years survive every new build.
+HISTORY_DIR = "sarc_history"
+ID_COLS = ["CDSCode", "County", "District", "School"]
+HISTORY_COLS = ID_COLS + list(METRIC_CONFIG) + [MISSING_COL]
+# Row key per level; districts are per county, as in rank_districts
+TREND_KEYS = {"School": ["CDSCode"], "District": ["County", "District"]}
+
+_PARTITIONING = ds.partitioning(pa.schema([("YEAR", pa.string())]), flavor="hive")
+
+
+def append_year(df, year=None, root=HISTORY_DIR):
+    """
+    Write one SARC year into the history store, replacing only that year.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Master table for a single year.
+    year : str, optional
+        Partition key such as "2024-25"; defaults to the most common
+        ``SARCYEAR`` value in *df*.
+    root : str
+        Dataset directory.
+
+    Returns
+    -------
+    str  –  the year that was written.
+    """
+    if year is None:
+        year = df["SARCYEAR"].mode().iloc[0]
+    cols = [c for c in HISTORY_COLS if c in df.columns]
+    snapshot = (df[cols].drop_duplicates("CDSCode")
+                .sort_values(["County", "CDSCode"])
+                .assign(YEAR=year))
+    table = pa.Table.from_pandas(snapshot, preserve_index=False)
+    ds.write_dataset(
+        # Each year keeps the MISSING_COL bit order it was written with
+        table.replace_schema_metadata({**table.schema.metadata, **missing_bits_metadata()}),
+        root,
+        format="parquet",
+        partitioning=_PARTITIONING,
+        existing_data_behavior="delete_matching",
+        basename_template="part-{i}.parquet",
+    )
+    return year
+
+
+def available_years(root=HISTORY_DIR):
+    """Sorted list of years present in the store (directory listing only)."""
+    if not os.path.isdir(root):
+        return []
+    return sorted(d.split("=", 1)[1] for d in os.listdir(root) if d.startswith("YEAR="))
+
+
+def _read_year(year, columns, county, root):
+    """
+    One year's partition as an Arrow table: the *columns* it has, with
+    metric cells flagged in MISSING_COL set to null, decoded with that
+    year's own bit order.
+    """
+    part = ds.dataset(os.path.join(root, f"YEAR={year}"), format="parquet")
+    read = [c for c in columns if c in part.schema.names]
+    metrics = [c for c in read if c in METRIC_CONFIG]
+    decode = bool(metrics) and MISSING_COL in part.schema.names
+    extra = ([MISSING_COL] if decode else []) + (["County"] if county is not None and "County" not in read else [])
+    # A year is one small row group; reading its files directly and
+    # filtering in memory beats a dataset scan with a pushed-down filter
+    table = pa.concat_tables(pq.ParquetFile(f).read(columns=read + extra, use_threads=False)
+                             for f in part.files)
+    if county is not None:
+        table = table.filter(pc.equal(table["County"], county))
+    if not decode:
+        return table.select(read)
+    bits = stored_bits(part.schema.metadata)
+    mask = table[MISSING_COL]
+    for col in metrics:
+        if bits is not None and col not in bits:
+            continue
+        flagged = pc.not_equal(pc.bit_wise_and(mask, pa.scalar(metric_bit(col, bits), mask.type)), 0)
+        values = pc.if_else(flagged, pa.scalar(None, table[col].type), table[col])
+        table = table.set_column(read.index(col), col, values)
+    return table.select(read)
+
+
+def load_history(columns, years=None, county=None, root=HISTORY_DIR):
+    """
+    Read a column/year slice of the history store.
+
+    Only the partitions for *years* and the requested *columns* are read.
+    Metric cells flagged in MISSING_COL come back as NaN, decoded with each
+    year's own bit order; columns a year doesn't have come back as NaN.
+    """
+    cols = [c for c in columns if c != "YEAR"]
+    tables = []
+    for year in available_years(root):
+        if years is not None and year not in years:
+            continue
+        table = _read_year(year, cols, county, root)
+        tables.append(table.append_column("YEAR", pa.array([year] * table.num_rows, pa.string())))
+    if not tables:
+        return pd.DataFrame(columns=["YEAR"] + cols)
+    # One conversion for all years; a column missing from some years is null there
+    table = pa.concat_tables(tables, promote_options="permissive")
+    return table.to_pandas().reindex(columns=["YEAR"] + cols)
+
+
+def trend(metric, level="School", years=None, county=None, root=HISTORY_DIR):
+    """
+    Year-over-year values and changes for one metric.
+
+    Parameters
+    ----------
+    metric : str
+        A METRIC_CONFIG column, e.g. "SMATH_Y1".
+    level : {"School", "District"}
+        Schools are keyed by CDSCode; districts, keyed by County and
+        District, average their schools.
+    years : list[str], optional
+        Years to include (default: every year in the store).
+
+    Returns
+    -------
+    pd.DataFrame  –  one row per school / district, one column per year,
+    plus a "Δ <year>" column for each year after the first.
+    """
+    years = sorted(years) if years is not None else available_years(root)
+    key = TREND_KEYS[level]
+    labels = key + (["District", "School"] if level == "School" else [])
+    hist = load_history(labels + [metric], years=years, county=county, root=root)
+    # (row × year) grid of means by scatter-add on factorized keys; much
+    # cheaper than pivot_table on string keys once there are many years
+    codes = np.zeros(len(hist), dtype=np.int64)
+    for col in key:
+        col_codes, uniques = pd.factorize(hist[col])
+        codes = codes * len(uniques) + col_codes
+    row, rows = pd.factorize(codes)
+    year, years = pd.factorize(hist["YEAR"], sort=True)
+    years = list(years)
+    values = hist[metric].to_numpy(dtype=float)
+    ok = ~np.isnan(values)
+    cell = row[ok] * len(years) + year[ok]
+    size = len(rows) * len(years)
+    sums = np.bincount(cell, weights=values[ok], minlength=size)
+    counts = np.bincount(cell, minlength=size)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        grid = np.where(counts > 0, sums / counts, np.nan).reshape(len(rows), len(years))
+    # Labels from each row's latest year (hist is in year order)
+    last = np.zeros(len(rows), dtype=np.int64)
+    last[row] = np.arange(len(hist))
+    wide = pd.concat([hist[labels].iloc[last].reset_index(drop=True),
+                      pd.DataFrame(grid, columns=years)], axis=1)
+    # Like pivot_table: drop rows and years with no values
+    filled = [y for y, any_value in zip(years, counts.reshape(len(rows), len(years)).any(axis=0)) if any_value]
+    wide = wide[~np.isnan(grid).all(axis=1)][labels + filled]
+    for prev, cur in zip(filled[:-1], filled[1:]):
+        wide[f"Δ {cur}"] = wide[cur] - wide[prev]
+    return wide.sort_values(key).reset_index(drop=True)
+
+
+def _year_values(year, key, metrics, county, root):
+    """*metrics* per *key* in one year, as Arrow (absent metrics null)."""
+    table = _read_year(year, key + metrics, county, root)
+    for col in metrics:
+        if col not in table.column_names:
+            table = table.append_column(col, pa.nulls(table.num_rows, pa.float64()))
+    if key == TREND_KEYS["School"]:
+        # append_year keeps one row per CDSCode
+        return table.select(key + metrics)
+    means = table.group_by(key).aggregate([(c, "mean") for c in metrics])
+    return pa.table({**{k: means[k] for k in key}, **{c: means[f"{c}_mean"] for c in metrics}})
+
+
+def _row_ids(table, key):
+    """One column identifying each row of *table* by its *key* columns."""
+    if len(key) == 1:
+        return table[key[0]]
+    parts = [pc.cast(table[k], pa.large_string()) for k in key]
+    return pc.binary_join_element_wise(*parts, pa.scalar("\x1f", pa.large_string()))
+
+
+def latest_changes(metrics, level="School", county=None, root=HISTORY_DIR):
+    """
+    Change in each of *metrics* between the two most recent years.
+
+    Returns the join key (TREND_KEYS[level]) plus one ``<metric>_CHG``
+    column per metric, one row per school / district of the latest year;
+    empty if fewer than two years are stored. Only the two latest
+    partitions are read, and the district means and the lookup of last
+    year's rows run in Arrow, so the cost doesn't grow with the years
+    stored.
+    """
+    years = available_years(root)[-2:]
+    if len(years) < 2:
+        return pd.DataFrame()
+    key, metrics = TREND_KEYS[level], list(metrics)
+    prev, cur = (_year_values(y, key, metrics, county, root) for y in years)
+    at = pc.index_in(_row_ids(cur, key), value_set=_row_ids(prev, key))
+    changes = {k: cur[k] for k in key}
+    for metric in metrics:
+        changes[f"{metric}_CHG"] = pc.subtract(cur[metric], prev[metric].take(at))
+    return pa.table(changes).sort_by([(k, "ascending") for k in key]).to_pandas()
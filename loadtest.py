@@ -0,0 +1,263 @@
+"""
+Load test: concurrent dashboard sessions driven headlessly through AppTest.
+
+Each simulated user is one AppTest session of the real app.py, run in its
+own thread in this process, the same way the Streamlit server gives every
+browser session its own script thread over shared caches. After the first
+page load, a user performs a seeded random script of actions: switch
+county, drag a weight slider, flip a target preference, add or remove a
+card, toggle Districts/Schools, rank near a place. Every action is one
+rerun.
+
+For each concurrency level the report gives reruns/sec across all users
+(first page loads have their own "load p50" column and are not counted
+as reruns), per-rerun latency percentiles and resident memory per open session (the
+growth in RSS while the level's sessions are open, so it also counts
+cache entries for counties and profiles no earlier user had scored).
+Latencies include the app's slider debounce (DEBOUNCE_S) on slider
+reruns, as a user would feel it. ``--think`` adds a pause between a
+user's actions; the default 0 drives the server flat out. Resync reruns
+(see _Session) are counted in their own column, not in reruns/sec, but
+they do use up wall time, so throughput is a slight underestimate.
+
+    python loadtest.py --users 1,2,4,8 --actions 20
+"""
+import argparse
+import gc
+import os
+import random
+import threading
+import time
+import traceback
+
+import numpy as np
+from streamlit import config
+from streamlit.runtime.runtime import Runtime
+from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+from streamlit.testing.v1 import AppTest, app_test, local_script_runner
+
+from scoring import METRIC_CONFIG
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+TIMEOUT_S = 120
+
+
+def _rss_mb():
+    """Current resident set size of this process in MB."""
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        import resource  # peak, not current, off Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+# ─── SESSIONS ──────────────────────────────────────────────────────────
+def _share_server_state():
+    """
+    Give concurrent AppTest sessions the Runtime and script cache a real
+    server shares between its sessions.
+
+    AppTest assumes one session at a time: each run installs a mock Runtime
+    and clears it when the run ends, which would pull the runtime out from
+    under another user's run; each run compiles app.py into a fresh
+    ScriptCache (and CPython's parser isn't safe to run from several threads
+    at once); and each run switches the ``global.appTest`` option on and
+    back off around itself. Fall back to the last installed runtime, hand
+    every run the same cache and leave the option on.
+    """
+    last = []
+
+    def instance(cls):
+        if cls._instance is not None:
+            last[:] = [cls._instance]
+            return cls._instance
+        if last:
+            return last[0]
+        raise RuntimeError("Runtime hasn't been created!")
+
+    Runtime.instance = classmethod(instance)
+    Runtime.exists = classmethod(lambda cls: cls._instance is not None or bool(last))
+    script_cache = ScriptCache()
+    app_test.ScriptCache = local_script_runner.ScriptCache = lambda: script_cache
+    config.set_option("global.appTest", True)
+
+
+class _Session:
+    """
+    One simulated browser session.
+
+    Widget callbacks rerun only their fragments, and AppTest rebuilds its
+    element tree from that partial output, while a browser keeps the rest
+    of the page on screen. When an action needs a widget the last rerun
+    didn't emit, the session first does an untimed full rerun ("resync").
+    """
+
+    def __init__(self, seed):
+        self.rng = random.Random(seed)
+        self.at = AppTest.from_file(APP_PATH, default_timeout=TIMEOUT_S)
+        self.resyncs = 0
+
+    def widget(self, kind, **kwargs):
+        try:
+            return getattr(self.at, kind)(**kwargs)
+        except KeyError:
+            self.at.run()
+            self.resyncs += 1
+            return getattr(self.at, kind)(**kwargs)
+
+    def buttons(self, label_test):
+        found = [b for b in self.at.button if label_test(b.label)]
+        if not found:
+            self.at.run()
+            self.resyncs += 1
+            found = [b for b in self.at.button if label_test(b.label)]
+        return found
+
+
+# ─── SCRIPTED ACTIONS ──────────────────────────────────────────────────
+# Each applies one widget interaction to a _Session; a timed run() follows.
+def _switch_county(s):
+    box = s.widget("selectbox", key="county_sel")
+    box.set_value(s.rng.choice([c for c in box.options if c != box.value]))
+
+
+def _drag_slider(s):
+    col = s.rng.choice(list(METRIC_CONFIG))
+    s.widget("slider", key=f"w_{col}").set_value(s.rng.randint(0, 10))
+
+
+def _flip_target(s):
+    col = s.rng.choice([c for c, cfg in METRIC_CONFIG.items() if cfg["type"] == "target"])
+    s.widget("button", key=f"targetbtn_{col}_{s.rng.randint(0, 1)}").click()
+
+
+def _add_card(s):
+    s.buttons(lambda label: label.endswith("Add"))[0].click()
+
+
+def _remove_card(s):
+    found = [b for b in s.at.button if b.label == "✕"]
+    if found:
+        s.rng.choice(found).click()
+    else:
+        _add_card(s)
+
+
+def _near(s):
+    place = s.rng.choice(["94612", "92130", "Fresno", "95814", "Torrey Pines High", ""])
+    s.widget("text_input", key="near_q").input(place)
+
+
+def _toggle_mode(s):
+    key = "mode_sch" if s.at.session_state["district_mode"] else "mode_dist"
+    s.widget("button", key=key).click()
+
+
+ACTIONS = {
+    "county": (_switch_county, 3),
+    "slider": (_drag_slider, 4),
+    "target": (_flip_target, 2),
+    "add": (_add_card, 1),
+    "remove": (_remove_card, 1),
+    "mode": (_toggle_mode, 2),
+    "near": (_near, 1),
+}
+
+
+# ─── RUNNER ────────────────────────────────────────────────────────────
+def _user(seed, n_actions, think, start, results, sessions):
+    """One simulated user: first page load, then *n_actions* reruns."""
+    names = list(ACTIONS)
+    weights = [ACTIONS[a][1] for a in names]
+    start.wait()
+    s = _Session(seed)
+    t = time.perf_counter()
+    s.at.run()
+    results.append(("load", time.perf_counter() - t, bool(s.at.exception)))
+    sessions.append(s)
+    for _ in range(n_actions):
+        if think:
+            time.sleep(s.rng.expovariate(1 / think))
+        name = s.rng.choices(names, weights)[0]
+        try:
+            ACTIONS[name][0](s)
+            t = time.perf_counter()
+            s.at.run()
+        except Exception as exc:  # a missing widget or a timeout ends this user
+            traceback.print_exc()
+            print(f"❌ user {seed}: {name} failed: {exc!r}")
+            results.append((name, np.nan, True))
+            return
+        results.append((name, time.perf_counter() - t, bool(s.at.exception)))
+
+
+def run_level(users, n_actions, think, seed):
+    """
+    Drive *users* concurrent sessions through one round of actions.
+
+    Returns
+    -------
+    dict  –  wall time, per-rerun samples and memory figures for the level.
+    """
+    gc.collect()
+    rss_before = _rss_mb()
+    start = threading.Barrier(users)
+    results, sessions = [], []
+    threads = [threading.Thread(target=_user, args=(seed + i, n_actions, think, start, results, sessions))
+               for i in range(users)]
+    t = time.perf_counter()
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join()
+    wall = time.perf_counter() - t
+    # Sessions are still open here, so their state counts towards RSS
+    gc.collect()
+    rss_after = _rss_mb()
+    return {"users": users, "wall": wall, "results": results,
+            "resyncs": sum(s.resyncs for s in sessions),
+            "rss": rss_after, "per_session": max(rss_after - rss_before, 0) / users}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", default="1,2,4,8",
+                        help="comma-separated concurrency levels")
+    parser.add_argument("--actions", type=int, default=20, help="reruns per user after first load")
+    parser.add_argument("--think", type=float, default=0.0, help="mean pause between actions (s)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    levels = [int(u) for u in args.users.split(",")]
+
+    _share_server_state()
+    print(f"Warming caches ({_rss_mb():.0f} MB)...")
+    _user(args.seed - 1, args.actions, 0, threading.Barrier(1), [], [])
+
+    print(f"{'users':>5}{'reruns':>8}{'wall s':>8}{'reruns/s':>10}"
+          f"{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'load p50':>10}"
+          f"{'errors':>8}{'resync':>8}{'RSS MB':>8}{'MB/sess':>9}")
+    last = None
+    for users in levels:
+        level = run_level(users, args.actions, args.think, args.seed)
+        done = [(a, t * 1000) for a, t, _ in level["results"] if not np.isnan(t)]
+        reruns = np.array([t for a, t in done if a != "load"])
+        loads = np.array([t for a, t in done if a == "load"])
+        errors = sum(e for _, _, e in level["results"])
+        p50, p90, p99 = np.percentile(reruns, [50, 90, 99]) if len(reruns) else (np.nan,) * 3
+        print(f"{users:>5}{len(reruns):>8}{level['wall']:>8.1f}{len(reruns) / level['wall']:>10.1f}"
+              f"{p50:>9.0f}{p90:>9.0f}{p99:>9.0f}{np.median(loads):>10.0f}"
+              f"{errors:>8}{level['resyncs']:>8}{level['rss']:>8.0f}{level['per_session']:>9.1f}")
+        last = level, done
+
+    level, done = last
+    print(f"\nPer-action latency at {level['users']} users (ms):")
+    for name in ["load"] + list(ACTIONS):
+        samples = np.array([t for a, t in done if a == name])
+        if len(samples):
+            print(f"  {name:<8}{len(samples):>5}  p50 {np.percentile(samples, 50):>7.0f}"
+                  f"  p90 {np.percentile(samples, 90):>7.0f}")
+
+
+if __name__ == "__main__":
+    main()
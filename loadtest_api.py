@@ -0,0 +1,122 @@
+"""
+Load test for the scoring API (api.py).
+
+Starts uvicorn in a separate process, then drives it with N keep-alive
+HTTP clients for a fixed duration per concurrency level, using a mix of
+default-profile leaderboards, custom-weight county rescoring and statewide
+rank queries. Reports successful requests/sec and latency percentiles of
+the 200 responses (503s from the bounded queue are counted separately).
+
+    python loadtest_api.py --concurrency 1 8 32 --seconds 10
+"""
+import argparse
+import asyncio
+import json
+import random
+import socket
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+HOST, PORT = "127.0.0.1", 8765
+
+
+def _request_mix(counties):
+    """(method, path, body) generators, weighted toward the common cases."""
+    def default_county():
+        return "POST", "/score", {"county": random.choice(counties), "limit": 25}
+
+    def custom_county():
+        return "POST", "/score", {
+            "county": random.choice(counties),
+            "level": random.choice(["School", "District"]),
+            "weights": {"SMATH_Y1": random.randint(0, 10), "AVG_SIZE": random.randint(0, 10)},
+            "targets": {"PERDI": random.choice([0, 100])},
+            "limit": 25,
+        }
+
+    def statewide_rank():
+        return "POST", "/rank", {"level": "District",
+                                 "weights": {"SELA_Y1": random.randint(1, 10)},
+                                 "names": ["San Diego Unified", "Los Angeles Unified"]}
+
+    return [default_county] * 5 + [custom_county] * 4 + [statewide_rank]
+
+
+async def _client(stop_at, mix, latencies, statuses):
+    reader, writer = await asyncio.open_connection(HOST, PORT)
+    try:
+        while time.perf_counter() < stop_at:
+            method, path, body = random.choice(mix)()
+            payload = json.dumps(body).encode()
+            head = (f"{method} {path} HTTP/1.1\r\nHost: {HOST}\r\n"
+                    f"Content-Type: application/json\r\nContent-Length: {len(payload)}\r\n\r\n")
+            start = time.perf_counter()
+            writer.write(head.encode() + payload)
+            await writer.drain()
+            status_line = await reader.readline()
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b""):
+                    break
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":")[1])
+            await reader.readexactly(length)
+            status = int(status_line.split()[1])
+            statuses[status] = statuses.get(status, 0) + 1
+            if status == 200:
+                latencies.append(time.perf_counter() - start)
+    finally:
+        writer.close()
+
+
+async def _run_level(concurrency, seconds, mix):
+    latencies, statuses = [], {}
+    stop_at = time.perf_counter() + seconds
+    start = time.perf_counter()
+    await asyncio.gather(*[_client(stop_at, mix, latencies, statuses) for _ in range(concurrency)])
+    elapsed = time.perf_counter() - start
+    ms = np.array(latencies) * 1000
+    print(f"{concurrency:>5} {len(ms) / elapsed:>9.1f} {np.percentile(ms, 50):>8.1f} "
+          f"{np.percentile(ms, 95):>8.1f} {np.percentile(ms, 99):>8.1f} {ms.max():>8.1f}  {statuses}")
+
+
+async def _main(levels, seconds):
+    reader, writer = await asyncio.open_connection(HOST, PORT)
+    writer.write(f"GET /counties HTTP/1.1\r\nHost: {HOST}\r\nConnection: close\r\n\r\n".encode())
+    counties = json.loads((await reader.read()).split(b"\r\n\r\n", 1)[1])
+    writer.close()
+    mix = _request_mix([c for c in counties if c != "Unknown"])
+    print(f"{'conc':>5} {'ok/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}  status")
+    for concurrency in levels:
+        await _run_level(concurrency, seconds, mix)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+
+    server = subprocess.Popen([sys.executable, "-m", "uvicorn", "api:app", "--host", HOST,
+                               "--port", str(PORT), "--log-level", "warning"])
+    try:
+        while True:
+            try:
+                socket.create_connection((HOST, PORT), timeout=0.2).close()
+                break
+            except OSError:
+                if server.poll() is not None:
+                    sys.exit("uvicorn exited during startup")
+                time.sleep(0.1)
+        asyncio.run(_main(args.concurrency, args.seconds))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
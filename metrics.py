@@ -0,0 +1,212 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+# ─── METRIC REGISTRY ───────────────────────────────────────────────────
+# The one place a metric is declared. The builder keeps only the columns
+# registered here, the scoring engine weighs them, and the dashboard lays
+# out its sliders, cards and table columns from the same entries.
+#
+# Per-metric keys:
+#   label / tip          slider label and tooltip
+#   group                key into METRIC_GROUPS (sidebar / card grouping)
+#   source               build stage that produces the column:
+#                        "caall" (CAASPP), "class_size" (acselm + acssec)
+#                        or "dna" (enrbysubgrp)
+#   short / format       table column header and number format
+#   trend                show a year-over-year Δ column when history exists
+#   range                plausible (min, max); the build counts values outside it
+#   type                 "linear" (with direction) or "target" (with options)
+#   default_weight       initial slider position (0–10)
+METRIC_CONFIG = {
+    "SMATH_Y1": {
+        "label": "Math Proficiency",
+        "group": "Academic Performance",
+        "source": "caall",
+        "short": "Math %",
+        "format": "%.1f",
+        "trend": True,
+        "range": (0, 100),
+        "type": "linear",
+        "direction": "higher",
+        "default_weight": 8,
+        "tip": "Higher values favour schools with stronger math CAASPP scores.",
+    },
+    "SELA_Y1": {
+        "label": "English Language Arts",
+        "group": "Academic Performance",
+        "source": "caall",
+        "short": "ELA %",
+        "format": "%.1f",
+        "trend": True,
+        "range": (0, 100),
+        "type": "linear",
+        "direction": "higher",
+        "default_weight": 8,
+        "tip": "Higher values favour schools with stronger ELA CAASPP scores.",
+    },
+    "AVG_SIZE": {
+        "label": "Class Size",
+        "group": "Environment",
+        "source": "class_size",
+        "short": "Class Sz",
+        "format": "%.1f",
+        "range": (1, 60),
+        "type": "linear",
+        "direction": "lower",
+        "default_weight": 5,
+        "tip": "Higher importance favours schools with smaller average class sizes.",
+    },
+    "PERDI": {
+        "label": "Socio-Econ Disadvantaged",
+        "group": "Student Demographics",
+        "source": "dna",
+        "short": "Disadv %",
+        "format": "%.1f",
+        "range": (0, 100),
+        "type": "target",
+        "options": {"Affluent": 0, "Mixed": 50, "Disadvantaged": 100},
+        "default_weight": 3,
+        "default_pref": "Affluent",
+        "tip": "Affluent targets <10 %, Mixed ≈50 %, Disadvantaged targets >90 %.",
+    },
+    "PEREL": {
+        "label": "English Learners",
+        "group": "Student Demographics",
+        "source": "dna",
+        "short": "EL %",
+        "format": "%.1f",
+        "range": (0, 100),
+        "type": "target",
+        "options": {"Few EL": 0, "Balanced": 50, "EL-Rich": 100},
+        "default_weight": 3,
+        "default_pref": "Few EL",
+        "tip": "Few EL targets <10 %, Balanced ≈50 %, EL-Rich targets >90 % English Learner students.",
+    },
+    "PERSD": {
+        "label": "Students w/ Disabilities",
+        "group": "Student Demographics",
+        "source": "dna",
+        "short": "SWD %",
+        "format": "%.1f",
+        "range": (0, 100),
+        "type": "target",
+        "options": {"Few SWD": 0, "Balanced": 50, "Inclusive": 100},
+        "default_weight": 2,
+        "default_pref": "Few SWD",
+        "tip": "Few SWD targets <10 %, Balanced ≈50 %, Inclusive targets >90 % Students w/ Disabilities.",
+    },
+}
+
+# Card / sidebar groups, in display order
+METRIC_GROUPS = {
+    "Academic Performance": {"title": "Academic Excellence",  "icon": "🎓", "css": "a"},
+    "Environment":          {"title": "Environment & Scale",  "icon": "🏫", "css": "c"},
+    "Student Demographics": {"title": "Student Demographics", "icon": "👥", "css": "b"},
+}
+
+# Non-metric columns the master table keeps (identity, search, history,
+# proximity)
+MASTER_ID_COLS = ["CDSCode", "SARCYEAR", "County", "District", "School", "CITY", "LAT", "LON"]
+
+# Per-row bitmask of metrics with no source value (bit i = i-th registered
+# metric). The stored metric is 0 for those cells; readers use the mask
+# to tell "no data" from a real 0. Every file that stores the mask also
+# records its bit order (schema metadata MISSING_BITS_KEY, a JSON list of
+# metric names), so files written before a metric was added, removed or
+# reordered still decode: readers recode the mask with remap_missing.
+MISSING_COL = "MISSING"
+MISSING_BITS_KEY = b"sarc.missing_bits"
+
+
+def metric_cols(source=None):
+    """Registered metric columns, optionally only those built by *source*."""
+    return [c for c, cfg in METRIC_CONFIG.items() if source is None or cfg["source"] == source]
+
+
+def trend_cols():
+    """Metrics that get a year-over-year change column."""
+    return [c for c, cfg in METRIC_CONFIG.items() if cfg.get("trend")]
+
+
+def master_columns():
+    """Every column the builder writes to the master table."""
+    return MASTER_ID_COLS + metric_cols() + [MISSING_COL]
+
+
+def metric_bit(col, bits=None):
+    """Bit of *col* in MISSING_COL under bit order *bits* (default: the registry's)."""
+    return 1 << (bits or metric_cols()).index(col)
+
+
+def missing_mask(df):
+    """MISSING_COL values (uint32) from the NaN cells of *df*'s metric columns."""
+    mask = np.zeros(len(df), dtype=np.uint32)
+    for col in metric_cols():
+        if col in df.columns:
+            mask |= np.where(df[col].isna().to_numpy(), np.uint32(metric_bit(col)), np.uint32(0))
+    return mask
+
+
+def is_missing(df, col, bits=None):
+    """
+    Boolean array: rows of *df* with no source value for *col*.
+
+    *bits* is the mask's stored bit order when it isn't the registry's
+    (see stored_bits); a metric absent from it is never flagged.
+    """
+    if MISSING_COL not in df.columns or (bits is not None and col not in bits):
+        return np.zeros(len(df), dtype=bool)
+    return (df[MISSING_COL].to_numpy() & metric_bit(col, bits)) != 0
+
+
+def restore_missing(df, cols):
+    """Copy of *df* with missing cells of *cols* set back to NaN."""
+    out = df.copy()
+    for col in cols:
+        out[col] = out[col].mask(is_missing(df, col))
+    return out
+
+
+def missing_bits_metadata():
+    """Parquet schema metadata entry recording MISSING_COL's current bit order."""
+    return {MISSING_BITS_KEY: json.dumps(metric_cols()).encode()}
+
+
+def stored_bits(metadata):
+    """Bit order saved in Parquet schema *metadata*; None for files that predate it."""
+    raw = (metadata or {}).get(MISSING_BITS_KEY)
+    return json.loads(raw) if raw else None
+
+
+def remap_missing(df, bits):
+    """
+    *df* with MISSING_COL recoded from stored bit order *bits* to the
+    registry's. Flags of metrics no longer registered are dropped. *df* is
+    returned as is when the orders agree or *bits* is None (older files,
+    written under the current order).
+    """
+    if bits is None or MISSING_COL not in df.columns or bits == metric_cols()[:len(bits)]:
+        return df
+    mask = np.zeros(len(df), dtype=np.uint32)
+    for col in metric_cols():
+        mask |= np.where(is_missing(df, col, bits), np.uint32(metric_bit(col)), np.uint32(0))
+    return df.assign(**{MISSING_COL: mask.astype(df[MISSING_COL].dtype)})
+
+
+def read_table(path, columns=None, **kwargs):
+    """pd.read_parquet of a file with MISSING_COL, recoded to the registry's bit order."""
+    frame = pd.read_parquet(path, columns=columns, **kwargs)
+    return remap_missing(frame, stored_bits(pq.read_schema(path).metadata))
+
+
+def card_groups():
+    """METRIC_GROUPS with each group's metric ``keys``, skipping empty groups."""
+    groups = []
+    for name, meta in METRIC_GROUPS.items():
+        keys = [c for c, cfg in METRIC_CONFIG.items() if cfg["group"] == name]
+        if keys:
+            groups.append({**meta, "keys": keys})
+    return groups
@@ -0,0 +1,114 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from metrics import METRIC_CONFIG, is_missing, metric_cols
+
+# ─── DATA QUALITY ──────────────────────────────────────────────────────
+# Vectorized checks run by build_master.py while it merges the sources.
+# Counts are accumulated per chunk, so streaming builds get the same
+# report as eager ones. The report is printed and saved as JSON next to
+# the master table.
+QUALITY_PATH = "sarc_quality.json"
+
+# enrbysubgrp share groups that should each sum to ~100 % per school
+DNA_SHARE_GROUPS = {
+    "gender": ["PERGF", "PERGM", "PERGX"],
+    "race/ethnicity": ["PERAI", "PERAS", "PERAA", "PERFI", "PERHI", "PERPI", "PERMULTI", "PERWH"],
+}
+SHARE_TOLERANCE = 5.0
+
+
+class QualityReport:
+    """Running totals for one build; `summary()` turns them into the report."""
+
+    def __init__(self):
+        self.rows = 0
+        self.matched = {}
+        self.source_rows = {}
+        self.duplicates = {}
+        self.missing = dict.fromkeys(metric_cols(), 0)
+        self.out_of_range = dict.fromkeys(metric_cols(), 0)
+        self.share_rows = 0
+        self.share_off = dict.fromkeys(DNA_SHARE_GROUPS, 0)
+        self.unplaced = 0
+        self._dir_keys = []
+
+    def check_source(self, name, keys):
+        """
+        Row count and duplicate CDS keys of one loaded source table. A
+        source read from several files (class_size) is checked once per
+        file; a CDS appearing in two different files is not a duplicate.
+        """
+        keys = pd.Series(keys)
+        self.source_rows[name] = self.source_rows.get(name, 0) + len(keys)
+        self.duplicates[name] = self.duplicates.get(name, 0) + int(keys.duplicated().sum())
+        self.matched.setdefault(name, 0)
+
+    def check_shares(self, chunk):
+        """Count enrbysubgrp rows whose share groups don't sum to ~100."""
+        self.share_rows += len(chunk)
+        for group, cols in DNA_SHARE_GROUPS.items():
+            present = [c for c in cols if c in chunk.columns]
+            if not present:
+                continue
+            total = chunk[present].apply(pd.to_numeric, errors="coerce").fillna(0).to_numpy().sum(axis=1)
+            self.share_off[group] += int((np.abs(total - 100) > SHARE_TOLERANCE).sum())
+
+    def check_merged(self, df, join_keys):
+        """
+        Checks on one merged directory chunk (after MISSING_COL is set).
+
+        *join_keys* maps a source name to the join column its merge added;
+        a non-null key means the directory row found a match.
+        """
+        self.rows += len(df)
+        self._dir_keys.append(df["CDSCode"].to_numpy())
+        for name, key in join_keys.items():
+            if key in df.columns:
+                self.matched[name] = self.matched.get(name, 0) + int(df[key].notna().sum())
+        if "LAT" in df.columns:
+            self.unplaced += int(df["LAT"].isna().sum())
+        for col, cfg in METRIC_CONFIG.items():
+            if col not in df.columns:
+                continue
+            missing = is_missing(df, col)
+            self.missing[col] += int(missing.sum())
+            lo, hi = cfg.get("range", (-np.inf, np.inf))
+            values = df[col].to_numpy(dtype=float)
+            self.out_of_range[col] += int((~missing & ((values < lo) | (values > hi))).sum())
+
+    def summary(self):
+        keys = np.concatenate(self._dir_keys) if self._dir_keys else np.array([], dtype=object)
+        self.duplicates["schldir"] = int(pd.Series(keys).duplicated().sum())
+        rows = max(self.rows, 1)
+        return {
+            "rows": self.rows,
+            "match_rate": {k: round(v / rows, 4) for k, v in self.matched.items()},
+            "source_rows": self.source_rows,
+            "duplicate_cds": self.duplicates,
+            "missing": self.missing,
+            "out_of_range": self.out_of_range,
+            "dna_share_rows": self.share_rows,
+            "dna_shares_off": self.share_off,
+            "no_coordinates": self.unplaced,
+        }
+
+    def lines(self):
+        """Compact human-readable report, one line per check."""
+        s = self.summary()
+        fmt = lambda d: ", ".join(f"{k} {v}" for k, v in d.items())
+        return [
+            f"rows {s['rows']}  ·  match rate: "
+            + ", ".join(f"{k} {v:.1%}" for k, v in s["match_rate"].items()),
+            f"duplicate CDS: {fmt(s['duplicate_cds'])}",
+            f"missing: {fmt(s['missing'])}",
+            f"out of range: {fmt(s['out_of_range'])}",
+            f"DNA shares off by >{SHARE_TOLERANCE:g} pts (of {s['dna_share_rows']}): {fmt(s['dna_shares_off'])}",
+            f"no coordinates: {s['no_coordinates']}",
+        ]
+
+    def write(self, path=QUALITY_PATH):
+        with open(path, "w") as fh:
+            json.dump(self.summary(), fh, indent=2)
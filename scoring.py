@@ -0,0 +1,431 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from metrics import (
+    METRIC_CONFIG, MISSING_COL, is_missing, missing_bits_metadata, read_table, restore_missing,
+)
+
+# Columns averaged into the district leaderboard alongside the score
+DISTRICT_AGG_COLS = ["Custom Fit Score"] + list(METRIC_CONFIG)
+
+# Suffix of the per-metric score-point columns (see calculate_custom_scores)
+PTS_SUFFIX = "_PTS"
+
+LEADERBOARD_PATH = "sarc_leaderboards.parquet"
+# Schema metadata key: the missing-data mode a leaderboard file was scored under
+LEADERBOARD_MODE_KEY = b"sarc.missing_mode"
+
+
+def default_settings():
+    """Scoring settings for the out-of-the-box slider and target positions."""
+    settings = {}
+    for col, cfg in METRIC_CONFIG.items():
+        if cfg["type"] == "target":
+            settings[col] = {"weight": cfg["default_weight"],
+                             "target": cfg["options"][cfg["default_pref"]]}
+        else:
+            settings[col] = {"weight": cfg["default_weight"]}
+    return settings
+
+
+def score_plan(settings):
+    """
+    The scoring work *settings* actually asks for.
+
+    Returns a tuple of ``(column, weight, type, param)`` for metrics with a
+    non-zero weight only, where *param* is the direction of a linear metric
+    or the target value of a target metric. Zero-weight metrics never
+    reach the scoring loop.
+    """
+    plan = []
+    for col, cfg in settings.items():
+        weight = cfg.get("weight", 0)
+        if weight == 0:
+            continue
+        metric = METRIC_CONFIG.get(col, {})
+        if metric.get("type", "linear") == "linear":
+            plan.append((col, weight, "linear", metric.get("direction")))
+        else:
+            plan.append((col, weight, "target", cfg.get("target", 50)))
+    return tuple(plan)
+
+
+# ─── SCORING KERNEL ────────────────────────────────────────────────────
+# Each active metric is argsorted once (NumPy's SIMD sort), then the
+# kernel finds the tie groups in the sorted order, averages their ranks
+# into percentiles, applies the concave curve and adds weight · curve into
+# the row totals — the same arithmetic as pandas' rank(pct=True) with
+# average ties. NaN cells sort last and are skipped, so each metric is
+# ranked only among the *n* rows that have it. The argsort is most of the
+# cost, so a compiled (Numba) walk measured no faster and was dropped.
+_HIGHER, _LOWER, _TARGET = 0, 1, 2
+CURVE = 0.7
+
+
+def _accumulate(key, order, n, weight, flip, out):
+    if n == 0:
+        # Metric missing in every row: nothing to rank
+        return
+    order = order[:n]
+    ranked = key[order]
+    # Tie groups [start, end) share the average of ranks start+1 … end
+    starts = np.flatnonzero(np.r_[True, ranked[1:] != ranked[:-1]])
+    ends = np.r_[starts[1:], n]
+    pct = (starts + ends + 1) / 2.0 / n
+    if flip:
+        pct = 1.0 - pct
+    out[order] += np.repeat(np.clip(pct, 0, 1) ** CURVE * weight, ends - starts)
+
+
+# How scoring treats metrics a school has no data for (MISSING_COL / NaN):
+#   "renormalize"  rank each metric among schools that have it and divide a
+#                  school's total by the weights of its present metrics only
+#   "median"       impute the metric's median and rank it like real data
+# Median stays the default: under "renormalize" a school reporting a single
+# metric is ranked on that metric alone and can top its county.
+# SARC_MISSING_MODE overrides the pick.
+MISSING_MODES = ("renormalize", "median")
+MISSING_MODE = os.environ.get("SARC_MISSING_MODE", "median")
+
+
+def weighted_percentiles(matrix, weights, kinds, targets, terms=None):
+    """
+    Σ weight · curve(percentile) per row of a (rows × metrics) float64 matrix.
+
+    *kinds* holds _HIGHER / _LOWER / _TARGET per column and *targets* the
+    target value of target columns (ranked by distance, closest best).
+    NaN cells add nothing; percentiles are over each column's valid rows.
+    Pass a zeroed Fortran-order array shaped like *matrix* as *terms* to
+    also keep each column's weight · curve term.
+    """
+    out = np.zeros(matrix.shape[0])
+    for j in range(matrix.shape[1]):
+        key = matrix[:, j]
+        if kinds[j] == _TARGET:
+            key = np.abs(key - targets[j])
+        n = len(key) - int(np.isnan(key).sum())
+        if terms is None:
+            _accumulate(key, np.argsort(key), n, float(weights[j]), bool(kinds[j] != _HIGHER), out)
+        else:
+            # Same additions into the row totals, one column at a time
+            _accumulate(key, np.argsort(key), n, float(weights[j]), bool(kinds[j] != _HIGHER), terms[:, j])
+            out += terms[:, j]
+    return out
+
+
+def _score_inputs(scored, plan, missing):
+    """
+    (matrix, weights, kinds, targets) for weighted_percentiles from a
+    score_plan. *scored* already has missing cells restored to NaN when
+    *missing* is "renormalize"; "median" imputes them here.
+    """
+    matrix = np.empty((len(scored), len(plan)), order="F")
+    for j, (col, _, _, _) in enumerate(plan):
+        values = pd.to_numeric(scored[col], errors="coerce")
+        if missing == "median":
+            values = values.mask(is_missing(scored, col))
+            median_val = values.median()
+            values = values.fillna(median_val if pd.notna(median_val) else 0)
+        matrix[:, j] = values.to_numpy(dtype=float)
+    weights = np.array([step[1] for step in plan], dtype=float)
+    kinds = np.array([_TARGET if t == "target" else _LOWER if p == "lower" else _HIGHER
+                      for _, _, t, p in plan], dtype=np.int8)
+    targets = np.array([p if t == "target" else 0.0 for _, _, t, p in plan], dtype=float)
+    return matrix, weights, kinds, targets
+
+
+def calculate_custom_scores(df, settings, missing=None, contributions=False):
+    """
+    Calculate a Custom Fit Score (0–10) for every row.
+
+    Uses percentile-rank normalisation with a concave curve (x^0.7)
+    so that above-average schools score closer to 10 while poor fits
+    still separate clearly toward 0.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        School-level data (must contain the columns referenced in *settings*).
+    settings : dict
+        {column: {"weight": int, "target": float (target metrics only)}}.
+    missing : {"renormalize", "median"}, optional
+        Missing-data handling (see MISSING_MODES); defaults to MISSING_MODE.
+        Missing metric cells come back as NaN in both modes; with
+        "renormalize" a school with no data for any weighted metric gets a
+        NaN score.
+    contributions : bool
+        Also keep, from the same pass, the points each weighted metric adds
+        to the score as float32 ``<metric>_PTS`` columns. A row's points sum
+        to its unrounded score; a metric the row is missing adds 0.
+
+    Returns
+    -------
+    pd.DataFrame  –  copy of *df* with a 'Custom Fit Score' column, sorted desc.
+    """
+    missing = missing or MISSING_MODE
+    if missing not in MISSING_MODES:
+        raise ValueError(f"missing must be one of {MISSING_MODES}")
+    # Cells flagged in MISSING_COL were 0-filled by the build. They come back
+    # as NaN in either mode; "median" imputes them only inside the ranking
+    scored = restore_missing(df, [c for c in METRIC_CONFIG if c in df.columns])
+    plan = [step for step in score_plan(settings) if step[0] in scored.columns]
+    total_weight = sum(step[1] for step in plan)
+
+    matrix, weights, kinds, targets = _score_inputs(scored, plan, missing)
+    terms = np.zeros_like(matrix) if contributions else None
+    weighted_sum = weighted_percentiles(matrix, weights, kinds, targets, terms)
+    # Per-row weight of the metrics actually present (all of them when imputing)
+    row_weight = ~np.isnan(matrix) @ weights
+
+    if contributions and total_weight > 0:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            points = np.where(row_weight[:, None] > 0, terms / row_weight[:, None] * 10, np.nan)
+        for j, (col, _, _, _) in enumerate(plan):
+            scored[col + PTS_SUFFIX] = points[:, j].astype(np.float32)
+
+    if total_weight > 0:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            score = np.where(row_weight > 0, weighted_sum / row_weight * 10, np.nan)
+        scored["Custom Fit Score"] = pd.Series(score, index=scored.index).round(1)
+    else:
+        scored["Custom Fit Score"] = 5.0
+
+    return scored.sort_values("Custom Fit Score", ascending=False)
+
+
+def rank_schools(df, settings, missing=None, contributions=False):
+    """Score *df* and attach a competition-style ``_rank`` column (1 = best).
+
+    Unscored rows (NaN score) share the last rank.
+    """
+    scored = calculate_custom_scores(df, settings, missing=missing, contributions=contributions)
+    scored["_rank"] = scored["Custom Fit Score"].rank(
+        ascending=False, method="min", na_option="bottom").astype(int)
+    return scored
+
+
+def rank_districts(scored):
+    """
+    Average school-level scores, metrics and score points per district, then rank.
+
+    Metric averages skip schools with no data for the metric (a district
+    with none gets NaN), so missing cells never count as 0. When *scored*
+    has a County column, districts are keyed by (County, District), since
+    district names repeat across counties.
+    """
+    num_cols = [c for c in DISTRICT_AGG_COLS if c in scored.columns]
+    pts_cols = [c for c in scored.columns if c.endswith(PTS_SUFFIX)]
+    keys = ["County", "District"] if "County" in scored.columns else ["District"]
+    scored = restore_missing(scored, [c for c in METRIC_CONFIG if c in scored.columns])
+    dist_agg = scored.groupby(keys)[num_cols + pts_cols].mean()
+    dist_agg[num_cols] = dist_agg[num_cols].round(1)
+    dist_agg = (
+        dist_agg.astype(dict.fromkeys(pts_cols, np.float32)).reset_index()
+        .sort_values("Custom Fit Score", ascending=False)
+    )
+    dist_agg["_rank"] = dist_agg["Custom Fit Score"].rank(
+        ascending=False, method="min", na_option="bottom").astype(int)
+    return dist_agg
+
+
+def build_leaderboards(df, settings=None, missing=None):
+    """
+    Precompute school and district leaderboards for every county.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        The full master table.
+    settings : dict, optional
+        Scoring settings; defaults to :func:`default_settings`.
+    missing : {"renormalize", "median"}, optional
+        Missing-data handling; defaults to MISSING_MODE.
+
+    Returns
+    -------
+    pd.DataFrame  –  one row per ranked school / district, tagged by
+    ``County`` and ``Level`` ("School" or "District").
+    """
+    settings = settings or default_settings()
+    keep = ["CDSCode", "School", "District"] + DISTRICT_AGG_COLS[1:] + [MISSING_COL]
+    keep = [c for c in keep if c in df.columns]
+    boards = []
+    for county, county_df in df.groupby("County", sort=True):
+        schools = rank_schools(county_df[keep], settings, missing=missing, contributions=True)
+        schools["County"] = county
+        schools["Level"] = "School"
+        districts = rank_districts(schools)
+        districts["County"] = county
+        districts["Level"] = "District"
+        boards.extend([schools, districts])
+    return pd.concat(boards, ignore_index=True)
+
+
+def write_leaderboards(df, path=LEADERBOARD_PATH, missing=None):
+    """
+    Write build_leaderboards(*df*) to *path*, recording the missing-data
+    mode and MISSING_COL's bit order in the file's schema metadata.
+    Returns the number of rows.
+    """
+    missing = missing or MISSING_MODE
+    table = pa.Table.from_pandas(build_leaderboards(df, missing=missing), preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), **missing_bits_metadata(),
+                                           LEADERBOARD_MODE_KEY: missing.encode()})
+    pq.write_table(table, path)
+    return table.num_rows
+
+
+def read_leaderboards(path=LEADERBOARD_PATH, missing=None):
+    """
+    split_leaderboards of the file at *path*.
+
+    Returns {} when the file is absent or was scored under a missing-data
+    mode other than *missing* (default MISSING_MODE). Its rankings and
+    points would then disagree with live scoring, so callers score live.
+    """
+    if not os.path.exists(path):
+        return {}
+    meta = pq.read_schema(path).metadata or {}
+    if meta.get(LEADERBOARD_MODE_KEY, b"").decode() != (missing or MISSING_MODE):
+        return {}
+    return split_leaderboards(read_table(path))
+
+
+def split_leaderboards(boards):
+    """Index a leaderboard table as {(County, Level): frame} for O(1) lookup."""
+    lookup = {}
+    for (county, level), frame in boards.groupby(["County", "Level"], sort=False):
+        frame = frame.drop(columns=["County", "Level"])
+        if level == "District":
+            frame = frame.drop(columns=["CDSCode", "School", MISSING_COL], errors="ignore")
+        elif MISSING_COL in frame.columns:
+            frame = frame.astype({MISSING_COL: "uint32"})
+        lookup[(county, level)] = frame.reset_index(drop=True)
+    return lookup
+
+
+# ─── COMPARISON ────────────────────────────────────────────────────────
+# compare_selection explains a ranking for the schools or districts a user
+# picked: each metric's value, its percentile in the ranked population
+# and the points it adds to the Custom Fit Score. Every metric is sorted
+# once for the population and all picks are placed with one searchsorted
+# call per metric, so comparing twenty picks costs the same as two.
+COMPARE_FIELDS = ("value", "percentile", "points")
+
+
+def _group_mean(x, group, k):
+    """NaN-skipping mean of the rows of *x* per group code 0 … k-1."""
+    ok = ~np.isnan(x)
+    total = np.zeros((k, x.shape[1]))
+    count = np.zeros((k, x.shape[1]))
+    np.add.at(total, group, np.where(ok, x, 0.0))
+    np.add.at(count, group, ok)
+    with np.errstate(invalid="ignore"):
+        return total / count
+
+
+def compare_selection(scored, picks, settings, level="School", missing=None):
+    """
+    Side-by-side breakdown of picked schools or districts.
+
+    Parameters
+    ----------
+    scored : pd.DataFrame
+        School-level ranking the picks come from (rank_schools output or a
+        school leaderboard), scored under *settings* and *missing*.
+    picks : list
+        (District, School) pairs for level "School", district names for
+        level "District". Duplicates and picks not in *scored* are dropped.
+    settings : dict
+        Scoring settings, as for calculate_custom_scores.
+    level : {"School", "District"}
+        District rows average their schools, like rank_districts.
+    missing : {"renormalize", "median"}, optional
+        Missing-data handling; defaults to MISSING_MODE.
+
+    Returns
+    -------
+    pd.DataFrame  –  one row per pick, in pick order, indexed by
+    (District, School) or District. Columns are ("Custom Fit Score", "")
+    then (field, metric) for each field in COMPARE_FIELDS: the metric
+    value (NaN when missing), the percentile (0–100) in the direction the
+    settings favour, and the score points, which add up to the unrounded
+    Custom Fit Score. Points come from *scored*'s ``<metric>_PTS`` columns
+    when it has them.
+    """
+    missing = missing or MISSING_MODE
+    if missing not in MISSING_MODES:
+        raise ValueError(f"missing must be one of {MISSING_MODES}")
+    metrics = [c for c in METRIC_CONFIG if c in scored.columns]
+    scored = scored.reset_index(drop=True)
+
+    # One gather: the population rows behind each pick and the pick they belong to
+    if level == "School":
+        keys = pd.MultiIndex.from_frame(scored[["District", "School"]])
+        picks = pd.MultiIndex.from_tuples(list(dict.fromkeys(map(tuple, picks))),
+                                          names=["District", "School"])
+        first = np.flatnonzero(~keys.duplicated())
+        found = keys[first].get_indexer(picks)
+        picks = picks[found >= 0]
+        rows = first[found[found >= 0]]
+        group = np.arange(len(rows))
+    elif level == "District":
+        picks = pd.Index(list(dict.fromkeys(picks)), name="District")
+        codes = picks.get_indexer(scored["District"])
+        rows = np.flatnonzero(codes >= 0)
+        picks = picks[np.unique(codes[rows])]
+        group = picks.get_indexer(scored["District"].to_numpy()[rows])
+    else:
+        raise ValueError("level must be 'School' or 'District'")
+
+    # Percentiles for every metric, in the direction / target the settings ask for
+    plan = score_plan({c: {**settings.get(c, {}), "weight": 1} for c in metrics})
+    weights = np.array([settings.get(c, {}).get("weight", 0) for c in metrics], dtype=float)
+    population = restore_missing(scored, metrics) if missing == "renormalize" else scored
+    matrix, _, kinds, targets = _score_inputs(population, plan, missing)
+
+    pct = np.full((len(rows), len(metrics)), np.nan)
+    for j in range(len(metrics)):
+        key = matrix[:, j]
+        if kinds[j] == _TARGET:
+            key = np.abs(key - targets[j])
+        ref = np.sort(key)
+        ref = ref[:len(ref) - int(np.isnan(ref).sum())]
+        if not len(ref):
+            continue
+        q = key[rows]
+        # Average rank of q's tie group, as in the scoring kernel
+        p = (np.searchsorted(ref, q, "left") + np.searchsorted(ref, q, "right") + 1) / 2.0 / len(ref)
+        if kinds[j] != _HIGHER:
+            p = 1.0 - p
+        pct[:, j] = np.where(np.isnan(q), np.nan, np.clip(p, 0, 1))
+
+    cached = [c + PTS_SUFFIX for c, w in zip(metrics, weights) if w]
+    if cached and all(c in scored.columns for c in cached):
+        # Points the scoring pass kept (calculate_custom_scores(contributions=True))
+        points = np.zeros((len(rows), len(metrics)))
+        for j, (c, w) in enumerate(zip(metrics, weights)):
+            if w:
+                points[:, j] = scored[c + PTS_SUFFIX].to_numpy(dtype=float)[rows]
+        points[np.isnan(points).any(axis=1)] = np.nan
+    else:
+        # Points: weight · curve(percentile), scaled like calculate_custom_scores
+        present = ~np.isnan(pct)
+        row_weight = present @ weights
+        with np.errstate(invalid="ignore", divide="ignore"):
+            points = np.where(present, pct, 0.0) ** CURVE * weights / row_weight[:, None] * 10
+        if weights.sum() == 0:
+            points[:] = 0.0
+        points[row_weight == 0] = np.nan
+
+    values = restore_missing(scored.iloc[rows], metrics)[metrics].to_numpy(dtype=float)
+    score = scored["Custom Fit Score"].to_numpy(dtype=float)[rows, None]
+    blocks = [_group_mean(x, group, len(picks)) for x in (score, values, pct * 100, points)]
+    score = blocks[0].round(1) if level == "District" else blocks[0]
+    columns = pd.MultiIndex.from_tuples(
+        [("Custom Fit Score", "")] + [(f, m) for f in COMPARE_FIELDS for m in metrics])
+    return pd.DataFrame(np.hstack([score] + blocks[1:]), index=picks, columns=columns)
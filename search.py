@@ -0,0 +1,179 @@
+import re
+from bisect import bisect_left
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# ─── STATEWIDE SEARCH INDEX ────────────────────────────────────────────
+# Every school and district, with trigram postings for its name and city,
+# prebuilt by build_master.py. A query is scored by how many of its
+# trigrams each entry shares, so partial names and small typos still hit;
+# all-digit queries match CDS code prefixes instead.
+SEARCH_PATH = "sarc_search.parquet"
+SEARCH_COLS = ["CDSCode", "County", "District", "School", "CITY"]
+
+# Share of the query's trigrams an entry must contain to be returned
+MIN_MATCH = 0.45
+# City-only matches rank just below an equally good name match
+CITY_FACTOR = 0.9
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+
+def normalize(text):
+    """Casefolded, punctuation-free, single-spaced form used for trigrams."""
+    return _NON_ALNUM.sub(" ", str(text).casefold()).strip()
+
+
+def trigrams(text):
+    """Set of padded character trigrams of the normalized *text*."""
+    padded = f" {normalize(text)} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)} if len(padded) > 3 else set()
+
+
+def _postings(texts):
+    """gram → sorted positions in *texts* containing it."""
+    post = {}
+    for pos, text in enumerate(texts):
+        for gram in trigrams(text):
+            post.setdefault(gram, []).append(pos)
+    return post
+
+
+def build_search_index(df):
+    """
+    Search entries and trigram postings for one master table.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Master table with the SEARCH_COLS columns.
+
+    Returns
+    -------
+    (pa.Table, pa.Table)  –  the entries (one row per district, then per
+    school) and the posting lists, one row per (field, gram) with the
+    entry ids (for "name") or city ids (for "city") that contain it.
+    """
+    schools = (df[SEARCH_COLS].dropna(subset=["District", "School"])
+               .drop_duplicates("CDSCode")
+               .fillna({"CITY": ""}))
+    # A district's CDS is its 7-digit county+district prefix padded with
+    # zeros; its city is where most of its schools are.
+    districts = (schools.groupby(["County", "District"], sort=True)
+                 .agg(CDSCode=("CDSCode", lambda s: s.iloc[0][:7] + "0" * 7),
+                      CITY=("CITY", lambda s: s.mode().iloc[0]))
+                 .reset_index()
+                 .assign(School=None, kind="District"))
+    schools = schools.sort_values(["County", "District", "School"]).assign(kind="School")
+    entries = pd.concat([districts, schools], ignore_index=True)[
+        ["kind", "County", "District", "School", "CDSCode", "CITY"]]
+
+    names = entries["School"].fillna(entries["District"])
+    cities, city_id = np.unique(entries["CITY"].to_numpy(dtype=str), return_inverse=True)
+    grams = []
+    for field, texts in (("name", names), ("city", cities)):
+        post = _postings(texts)
+        for gram in sorted(post):
+            grams.append((field, gram, post[gram]))
+
+    table = pa.Table.from_pandas(entries.assign(city_id=city_id.astype("int32"),
+                                                n_grams=[len(trigrams(n)) for n in names]),
+                                 preserve_index=False)
+    gram_table = pa.table({
+        "field": [g[0] for g in grams],
+        "gram": [g[1] for g in grams],
+        "ids": pa.array([g[2] for g in grams], type=pa.list_(pa.int32())),
+    })
+    return table, gram_table
+
+
+def write_search_index(df, path=SEARCH_PATH):
+    """Build the index for *df* and write it next to the master table."""
+    entries, grams = build_search_index(df)
+    pq.write_table(entries, path)
+    pq.write_table(grams, _grams_path(path))
+    return len(entries)
+
+
+def _grams_path(path):
+    return path.replace(".parquet", "_grams.parquet")
+
+
+class SearchIndex:
+    """
+    Loaded search index; `query` answers in about a millisecond statewide.
+
+    Posting lists are zero-copy NumPy slices of the stored Arrow buffers.
+    """
+
+    def __init__(self, entries, grams):
+        self.entries = entries.to_pandas()
+        self._n = len(self.entries)
+        self._n_cities = int(self.entries["city_id"].max()) + 1 if self._n else 0
+        self._city_id = self.entries["city_id"].to_numpy()
+        self._n_grams = self.entries["n_grams"].to_numpy()
+        records = self.entries[["kind", "County", "District", "School", "CDSCode", "CITY"]]
+        self._records = records.astype(object).where(records.notna(), None).to_numpy()
+
+        ids = grams.column("ids").combine_chunks()
+        values = ids.values.to_numpy()
+        offsets = ids.offsets.to_numpy()
+        self._post = {"name": {}, "city": {}}
+        for i, (field, gram) in enumerate(zip(grams.column("field").to_pylist(),
+                                              grams.column("gram").to_pylist())):
+            self._post[field][gram] = values[offsets[i]:offsets[i + 1]]
+
+        cds = self.entries["CDSCode"].to_numpy(dtype=str)
+        self._cds_order = np.argsort(cds, kind="stable")
+        self._cds_sorted = cds[self._cds_order].tolist()
+
+    @classmethod
+    def load(cls, path=SEARCH_PATH):
+        return cls(pq.read_table(path), pq.read_table(_grams_path(path)))
+
+    def _overlap(self, field, grams, size):
+        hits = [self._post[field][g] for g in grams if g in self._post[field]]
+        if not hits:
+            return np.zeros(size)
+        return np.bincount(np.concatenate(hits), minlength=size)
+
+    def _by_cds(self, digits, limit):
+        i = bisect_left(self._cds_sorted, digits)
+        j = i
+        while j < len(self._cds_sorted) and self._cds_sorted[j].startswith(digits) and j - i < limit:
+            j += 1
+        return self._cds_order[i:j], np.ones(j - i)
+
+    def query(self, text, limit=10):
+        """
+        Best matches for *text* by name, city or CDS code.
+
+        Returns up to *limit* dicts with ``kind``, ``county``, ``district``,
+        ``school`` (None for districts), ``cds``, ``city`` and ``score``
+        (0–1), best first. Shorter names win ties, then districts.
+        """
+        text = text.strip()
+        if normalize(text).replace(" ", "").isdigit():
+            hits, scores = self._by_cds(normalize(text).replace(" ", ""), limit)
+        else:
+            grams = trigrams(text)
+            if len(normalize(text)) < 2 or not grams:
+                return []
+            name = self._overlap("name", grams, self._n) / len(grams)
+            city = self._overlap("city", grams, self._n_cities)[self._city_id] / len(grams)
+            scores = np.maximum(name, CITY_FACTOR * city)
+            hits = np.flatnonzero(scores >= MIN_MATCH)
+            # Among equal containment, prefer names with fewer extra trigrams
+            order = np.lexsort((hits, self._n_grams[hits], -scores[hits]))[:limit]
+            hits, scores = hits[order], scores[hits[order]]
+
+        out = []
+        for i, score in zip(hits, scores):
+            kind, county, district, school, cds, city = self._records[i]
+            out.append({"kind": kind, "county": county, "district": district,
+                        "school": school, "cds": cds, "city": city,
+                        "score": round(float(score), 3)})
+        return out
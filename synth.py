@@ -0,0 +1,496 @@
+"""
+Synthetic SARC source files for scale testing.
+
+Writes schldir, caall, acselm, acssec and enrbysubgrp for any number of
+schools, in the layout CDE publishes and build_master.py reads: the same
+columns, 2-digit county codes, D/S codes as text in some files and as
+numbers in others, '--' suppression markers, blank cells, both SARCYEAR
+spellings, and a share of CDS codes in scientific notation (the quirk
+clean_cds undoes). Schools are spread over the 58 counties in their
+2024-25 proportions, with one dominant district per county and about
+five schools in each of the others.
+Metrics are drawn from correlated latent factors so their spreads and
+correlations look like the real table's, and each source covers the
+directory the way the real ones do (some schools missing, some extra
+rows). Everything comes from one seeded generator: the same arguments
+always write byte-identical files, .xlsx included (its timestamps are
+pinned).
+
+    python synth.py --schools 100000 --out /tmp/sarc_x10 --format txt --build
+    cd /tmp/sarc_x10 && python /path/to/bench_scoring.py
+
+``--build`` runs build_master.py in the output folder, which leaves the
+master Parquet file (plus leaderboards, search index and history) there;
+the dashboard, API and benchmarks read them from the working directory.
+.xlsx is the realistic format but slow to write past ~50k schools; the
+builder prefers .txt when both exist.
+"""
+import argparse
+import os
+import re
+import time
+import zipfile
+
+import numpy as np
+import openpyxl
+import pandas as pd
+
+from build_master import SOURCE_EXTS, build_sarc_master
+
+# Schools per county code 01–58 in the 2024-25 directory (relative weights)
+COUNTY_SCHOOLS = [
+    386, 5, 14, 90, 21, 19, 287, 14, 71, 363, 29, 88, 71, 24, 275, 66, 40, 22, 2202, 82,
+    78, 15, 64, 108, 12, 13, 135, 41, 35, 648, 131, 13, 524, 399, 28, 584, 772, 122, 249, 82,
+    180, 125, 403, 79, 92, 7, 47, 101, 187, 189, 44, 39, 20, 196, 25, 215, 63, 40,
+]
+# Grade span → share of schools
+GRADE_SPANS = {
+    "K-5": 0.233, "9-12": 0.164, "K-6": 0.162, "K-8": 0.101, "6-8": 0.087, "K-12": 0.056,
+    "7-8": 0.033, "P-6": 0.025, "7-12": 0.022, "P-5": 0.022, "6-12": 0.016, "P-8": 0.010,
+}
+# acselm grade columns ("O" = other / combination classes) and acssec subjects
+ELEM_GRADES = ["K", "1", "2", "3", "4", "5", "6", "O"]
+SEC_SUBJECTS = ["EN", "MA", "SC", "SS"]
+# Race / ethnicity mean shares for enrbysubgrp (Dirichlet concentration)
+RACE_SHARES = {"PERAI": 1.4, "PERAS": 9.7, "PERAA": 5.7, "PERFI": 2.5, "PERHI": 56.7,
+               "PERPI": 0.7, "PERMULTI": 5.4, "PERWH": 21.8}
+
+# Per source: CDS and school-year headers, spelled as CDE spells them
+ID_HEADERS = {"schldir": ("CDSCode", "SARCYear"), "caall": ("CDSCODE", "SarcYear"),
+              "acselm": ("CDSCODE", "SarcYear"), "acssec": ("CDSCODE", "SARCYear"),
+              "enrbysubgrp": ("CDSCODE", "SARCYear")}
+# Per source: share of directory schools it covers, extra (closed / non-directory) rows
+COVERAGE = {"caall": (0.987, 0.03), "acselm": (0.99, 0.02), "acssec": (0.99, 0.02),
+            "enrbysubgrp": (0.963, 0.008)}
+# Share of enrbysubgrp program cells (PEREL / PERSD / PERDI) left blank and
+# suppressed ('--'), per column
+DNA_GAPS = (0.015, 0.01)
+# Default share of CDS codes written in scientific notation
+SCI_CDS = 0.02
+# Timestamp pinned into .xlsx zip entries (the zip format's earliest date)
+XLSX_DATE = (1980, 1, 1, 0, 0, 0)
+
+_WORDS_A = ["Oak", "Pine", "Cedar", "Willow", "Maple", "Sierra", "Valley", "Mesa", "Ocean", "Sun",
+            "Rancho", "Vista", "Hill", "Lake", "River", "Canyon", "Palm", "Mission", "Golden", "Desert",
+            "Harbor", "Park", "Spring", "Meadow", "Bay", "Cherry", "Grand", "Eagle", "Falcon", "Ridge"]
+_WORDS_B = ["Grove", "View", "Crest", "Park", "Heights", "Creek", "Hills", "Glen", "wood", "brook",
+            "Springs", "Point", "Meadows", "Ranch", "Terrace", "Gardens", "Knolls", "Shores", "dale", "field"]
+_PEOPLE = ["Lincoln", "Washington", "Jefferson", "Roosevelt", "Kennedy", "Franklin", "Madison",
+           "Garfield", "Cesar Chavez", "John Muir", "Steinbeck", "Earhart", "Carver", "Martin Luther King",
+           "Rosa Parks", "Sequoia", "Redwood", "Juniper", "Magnolia", "Sycamore"]
+_SAINTS = ["Miguel", "Pablo", "Rafael", "Jose", "Marcos", "Luis", "Juan", "Bruno", "Carlos", "Dimas",
+           "Jacinto", "Gabriel", "Leandro", "Lorenzo", "Ramon", "Anselmo", "Clemente", "Fernando"]
+_DISTRICT_KINDS = ["Unified", "Unified", "Unified", "Elementary", "Union Elementary", "Union High",
+                   "Joint Unified", "City Elementary"]
+
+
+# ─── LAYOUT ────────────────────────────────────────────────────────────
+def _pick(rng, words, n):
+    return np.asarray(words, dtype=object)[rng.integers(0, len(words), n)]
+
+
+def _dedupe(names, groups):
+    """Append " 2", " 3", ... to repeats of a name within a group."""
+    frame = pd.DataFrame({"g": groups, "name": names})
+    k = frame.groupby(["g", "name"], sort=False).cumcount().to_numpy()
+    names = np.asarray(names, dtype=object).copy()
+    names[k > 0] = names[k > 0] + " " + (k[k > 0] + 1).astype(str).astype(object)
+    return names
+
+
+def _district_sizes(n, rng):
+    """School counts of one county's districts: one dominant, the rest ~lognormal(median 5)."""
+    if n < 4:
+        return [n]
+    sizes = [max(1, int(n * rng.beta(2, 5)))]
+    left = n - sizes[0]
+    while left > 0:
+        size = min(left, max(1, int(round(rng.lognormal(np.log(5), 1.0)))))
+        sizes.append(size)
+        left -= size
+    return sizes
+
+
+def school_layout(n_schools, rng):
+    """
+    One row per synthetic school: codes, names, place and latent factors.
+
+    Returns
+    -------
+    pd.DataFrame  –  C, D, S, CDSCode, District, School, CITY, ZIP, LAT,
+    LON, GRSPAN, CHARTER, ENROLL and the latent ADV (advantage) / ELL
+    factors the metric generators share.
+    """
+    weights = np.array(COUNTY_SCHOOLS, dtype=float)
+    per_county = rng.multinomial(n_schools - len(weights), weights / weights.sum()) + 1
+    c_lat = rng.uniform(33.0, 41.5, len(weights))
+    c_lon = rng.uniform(-123.5, -115.5, len(weights))
+
+    parts = []
+    for i, n in enumerate(per_county):
+        sizes = _district_sizes(int(n), rng)
+        n_cities = int(np.ceil(1.2 * n ** 0.6))
+        cities = _dedupe(np.where(rng.random(n_cities) < 0.25,
+                                  "San " + _pick(rng, _SAINTS, n_cities),
+                                  _pick(rng, _WORDS_A, n_cities) + _pick(rng, _WORDS_B, n_cities)),
+                         np.zeros(n_cities))
+        city_lat = c_lat[i] + rng.normal(0, 0.15, n_cities)
+        city_lon = c_lon[i] + rng.normal(0, 0.15, n_cities)
+        city_zip = rng.choice(np.arange(90001, 96162), n_cities, replace=False)
+        d_codes = rng.choice(90000, len(sizes), replace=False) + 10000
+        d_city = rng.integers(0, n_cities, len(sizes))
+        d_names = _dedupe(cities[d_city] + " " + _pick(rng, _DISTRICT_KINDS, len(sizes)),
+                          np.zeros(len(sizes)))
+        district = np.repeat(np.arange(len(sizes)), sizes)
+        # Schools mostly sit in their district's home city
+        city = np.where(rng.random(n) < 0.7, d_city[district], rng.integers(0, n_cities, n))
+        parts.append(pd.DataFrame({
+            "C": f"{i + 1:02d}",
+            "D": d_codes[district],
+            "District": d_names[district],
+            "CITY": cities[city],
+            "ZIP": city_zip[city] + rng.integers(0, 40, n),
+            "LAT": city_lat[city] + rng.normal(0, 0.02, n),
+            "LON": city_lon[city] + rng.normal(0, 0.02, n),
+            # Shared by a district's schools: drives its metrics together
+            "D_EFFECT": rng.normal(0, 0.6, len(sizes))[district],
+        }))
+    df = pd.concat(parts, ignore_index=True)
+    n = len(df)
+
+    # 7-digit school codes, unique statewide (so CDS codes are too);
+    # 9100000 and up are left for _cover's extra rows
+    df["S"] = rng.choice(9_000_000, n, replace=False) + 100_000
+    df["CDSCode"] = df["C"] + df["D"].astype(str) + df["S"].astype(str).str.zfill(7)
+    df["GRSPAN"] = rng.choice(list(GRADE_SPANS), n, p=np.array(list(GRADE_SPANS.values())) / sum(GRADE_SPANS.values()))
+    df["CHARTER"] = np.where(rng.random(n) < 0.12, "Yes", "No")
+    hi = df["GRSPAN"].str.split("-").str[1].astype(int)
+    kind = np.select([hi <= 6, hi <= 8, df["GRSPAN"].str[0].isin(["K", "P"])],
+                     ["Elementary", "Middle", "Academy"], "High")
+    stem = np.where(rng.random(n) < 0.4, _pick(rng, _PEOPLE, n),
+                    _pick(rng, _WORDS_A, n) + " " + _pick(rng, _WORDS_B, n).astype(str))
+    school = stem + " " + kind.astype(object)
+    school = np.where(df["CHARTER"] == "Yes", school + " Charter", school)
+    df["School"] = _dedupe(school, df["CDSCode"].str[:7])
+    df["ENROLL"] = rng.lognormal(np.log(np.where(hi >= 12, 1200, 450)), 0.6).round()
+    # Latent factors: socio-economic advantage (district + school) and English learners
+    df["ADV"] = df["D_EFFECT"] + rng.normal(0, 0.8, n)
+    df["ELL"] = rng.normal(0, 1, n)
+    return df.drop(columns="D_EFFECT")
+
+
+# ─── SOURCES ───────────────────────────────────────────────────────────
+def _sigmoid(x):
+    return 1 / (1 + np.exp(-x))
+
+
+def _cover(layout, name, rng):
+    """The rows a source reports: most directory schools plus some extras."""
+    share, extra = COVERAGE[name]
+    rows = layout[rng.random(len(layout)) < share]
+    n_extra = int(round(extra * len(layout)))
+    if n_extra:
+        # Closed or non-directory schools: same shape, codes the directory lacks
+        ghosts = layout.sample(n_extra, random_state=rng).copy()
+        ghosts["S"] = rng.choice(900_000, n_extra, replace=False) + 9_100_000
+        ghosts["CDSCode"] = ghosts["C"] + ghosts["D"].astype(str) + ghosts["S"].astype(str).str.zfill(7)
+        rows = pd.concat([rows, ghosts])
+    return rows.sort_values("CDSCode").reset_index(drop=True)
+
+
+def _ids(rows, year, name):
+    """CDS / C / D / S / year columns the way each CDE file writes them."""
+    cds_col, year_col = ID_HEADERS[name]
+    if name in ("schldir", "enrbysubgrp"):
+        return pd.DataFrame({cds_col: rows["CDSCode"], "C": rows["C"], "D": rows["D"].astype(str),
+                             "S": rows["S"].astype(str).str.zfill(7),
+                             year_col: f"{year}-{(year + 1) % 100:02d}"})
+    # caall / acselm / acssec: D and S are numbers, long year
+    return pd.DataFrame({cds_col: rows["CDSCode"], "C": rows["C"], "D": rows["D"],
+                         "S": rows["S"], year_col: f"{year}-{year + 1}"})
+
+
+def _as_reported(values, rng, suppressed=0.0, blank=0.0, decimals=0.02, u=None):
+    """
+    Object column of CDE-style cells: mostly whole numbers, some with
+    decimals, '--' where suppressed and None where blank. Pass the same
+    uniform draws *u* to columns a school suppresses together.
+    """
+    values = np.asarray(values, dtype=float)
+    out = pd.Series(values.round().astype(object))
+    ints = ~np.isnan(values)
+    out[ints] = values[ints].round().astype(np.int64)
+    dec = ints & (rng.random(len(values)) < decimals)
+    out[dec] = values[dec].round(2)
+    u = rng.random(len(values)) if u is None else u
+    out[~ints | (u < blank)] = None
+    out[(u >= blank) & (u < blank + suppressed)] = "--"
+    return out
+
+
+def directory(layout, year, rng):
+    """schldir: one row per school."""
+    n = len(layout)
+    area = rng.choice([209, 213, 310, 408, 415, 510, 530, 559, 619, 626, 650, 707, 714, 760, 805, 831, 909, 916, 949, 951], n)
+    def phone():
+        return ("(" + pd.Series(area).astype(str) + ") 555-"
+                + pd.Series(rng.integers(0, 10000, n)).astype(str).str.zfill(4))
+
+    slug = layout["District"].str.lower().str.replace(r"[^a-z]+", "", regex=True).str[:12]
+    zip5 = layout["ZIP"].astype(str)
+    frame = _ids(layout, year, "schldir")
+    frame = frame.assign(
+        DISTRICT=layout["District"], DPHONE=phone(),
+        SUPFNAME=_pick(rng, ["Maria", "James", "Linda", "Robert", "Ana", "David", "Susan", "Jose"], n),
+        SUPLNAME=_pick(rng, ["Garcia", "Smith", "Nguyen", "Johnson", "Lopez", "Lee", "Brown", "Martinez"], n),
+        DEMAIL="superintendent@" + slug + ".org", DWEB="www." + slug + ".org",
+        SCHOOL=layout["School"],
+        ADDRESS=pd.Series(rng.integers(100, 9999, n)).astype(str) + " "
+                + _pick(rng, _WORDS_A, n) + " " + _pick(rng, ["St.", "Ave.", "Blvd.", "Rd.", "Way"], n),
+        CITY=layout["CITY"], STATE="CA",
+        ZIP=np.where(rng.random(n) < 0.96,
+                     zip5 + "-" + pd.Series(rng.integers(0, 10000, n)).astype(str).str.zfill(4), zip5),
+        ADMPHONE=phone(), ADMNAME=_pick(rng, ["Principal", "Director", "Head of School"], n),
+        ADMEMAIL="office@" + slug + ".org", SCHWEB="www." + slug + ".org/school",
+        GRSPAN=layout["GRSPAN"], CHARTER=layout["CHARTER"],
+        # Optional directory coordinates, which build_master prefers over ZIP centroids
+        LATITUDE=layout["LAT"].round(5), LONGITUDE=layout["LON"].round(5),
+    )
+    return frame
+
+
+def caall(layout, year, rng):
+    """caall: CAASPP % meeting standard, school / district / state, two years."""
+    rows = _cover(layout, "caall", rng)
+    n = len(rows)
+    adv = rows["ADV"].to_numpy()
+    math = np.clip(31 + 20 * adv + rng.normal(0, 7, n), 0, 100)
+    ela = np.clip(41 + 20 * adv - 1.5 * rows["ELL"].to_numpy() + rng.normal(0, 6, n), 0, 100)
+    # A few out-of-range values, as in the real file
+    odd = rng.random(n) < 0.0002
+    math[odd] += 60
+    frame = _ids(rows, year, "caall")
+    district = rows["District"] + rows["C"]
+    # Small schools are suppressed in both subjects at once
+    u1, u2 = rng.random(n), rng.random(n)
+    for col, school, state, drift in [("ELA", ela, 47, 1.5), ("MATH", math, 35, 1.5)]:
+        d_mean = pd.Series(school).groupby(district.to_numpy()).transform("mean").to_numpy()
+        prior = np.clip(school + rng.normal(drift, 5, n), 0, 100)
+        frame[f"S{col}_Y1"] = _as_reported(school, rng, suppressed=0.045, blank=0.02, u=u1)
+        frame[f"D{col}_Y1"] = _as_reported(d_mean, rng, blank=0.01, decimals=0)
+        frame[f"ST{col}_Y1"] = state
+        frame[f"S{col}_Y2"] = _as_reported(prior, rng, suppressed=0.045, blank=0.02, u=u2)
+        frame[f"D{col}_Y2"] = _as_reported(d_mean + drift, rng, blank=0.01, decimals=0)
+        frame[f"ST{col}_Y2"] = state + 1
+    order = ["SELA_Y1", "SMATH_Y1", "DELA_Y1", "DMATH_Y1", "STELA_Y1", "STMATH_Y1",
+             "SELA_Y2", "SMATH_Y2", "DELA_Y2", "DMATH_Y2", "STELA_Y2", "STMATH_Y2"]
+    return frame[list(frame.columns[:5]) + order]
+
+
+def _class_block(frame, keys, served, enroll, size_mu, size_sd, students_per_section, rng):
+    """
+    AVG / NCS / NCM / NCL columns for *keys* over three years: 0 where a
+    grade or subject isn't served, blank for ~3% of schools and, in the
+    oldest year, often blank instead of 0.
+    """
+    n = len(enroll)
+    blank = rng.random(n) < 0.03
+    blocks = []
+    for year in (1, 2, 3):
+        avg_cols, nc_cols = {}, {}
+        for j, key in enumerate(keys):
+            on = served[:, j]
+            sections = np.where(on, rng.poisson(np.maximum(enroll / students_per_section, 0.5)), 0)
+            avg = np.where(sections > 0, rng.normal(size_mu, size_sd, n).round(), 0)
+            # Data-entry outliers
+            avg = np.where(rng.random(n) < 0.003, rng.uniform(45, 300, n).round(), avg)
+            band = np.digitize(avg, [21, 33])  # 1–20 small, 21–32 medium, 33+ large
+            gap = blank | (~on & (rng.random(n) < 0.5)) if year == 3 else blank
+            avg_cols[f"AVG{key}_Y{year}"] = np.where(gap, np.nan, avg)
+            for b, size in enumerate("SML"):
+                nc_cols[f"NC{size}{key}_Y{year}"] = np.where(gap, np.nan, np.where(band == b, sections, 0))
+        blocks.append(pd.DataFrame({**avg_cols, **nc_cols}, index=frame.index).astype("Int64"))
+    return pd.concat([frame, *blocks], axis=1)
+
+
+def class_sizes(layout, year, rng):
+    """acselm (grades K–6 + other) and acssec (EN / MA / SC / SS) class sizes."""
+    span = layout["GRSPAN"].str.split("-", expand=True)
+    lo = span[0].replace({"P": "-1", "K": "0"}).astype(int).to_numpy()
+    hi = span[1].astype(int).to_numpy()
+    out = {}
+    for name in ("acselm", "acssec"):
+        if name == "acselm":
+            rows = layout[(lo <= 6) | (rng.random(len(layout)) < 0.5)]
+        else:
+            rows = layout[hi >= 6]
+        rows = _cover(rows, name, rng)
+        r_span = rows["GRSPAN"].str.split("-", expand=True)
+        r_lo = r_span[0].replace({"P": "-1", "K": "0"}).astype(int).to_numpy()[:, None]
+        r_hi = r_span[1].astype(int).to_numpy()[:, None]
+        enroll = rows["ENROLL"].to_numpy()
+        frame = _ids(rows, year, name)
+        if name == "acselm":
+            grade = np.array([0, 1, 2, 3, 4, 5, 6, 99])
+            served = (grade >= r_lo) & (grade <= r_hi)
+            served[:, -1] = rng.random(len(rows)) < 0.1
+            out[name] = _class_block(frame, ELEM_GRADES, served, enroll / np.maximum(r_hi - r_lo + 1, 1)[:, 0],
+                                     22, 4, 24, rng)
+        else:
+            served = np.repeat(r_hi >= 6, len(SEC_SUBJECTS), axis=1)
+            out[name] = _class_block(frame, SEC_SUBJECTS, served, enroll, 27, 5, 150, rng)
+    return out["acselm"], out["acssec"]
+
+
+def enrollment(layout, year, rng):
+    """enrbysubgrp: % of enrollment per gender, race / ethnicity and program group."""
+    rows = _cover(layout, "enrbysubgrp", rng)
+    n = len(rows)
+    adv = rows["ADV"].to_numpy()
+    frame = _ids(rows, year, "enrbysubgrp")
+    gx = np.where(rng.random(n) < 0.2, rng.exponential(0.6, n).round(1), np.nan)
+    gf = np.clip(rng.normal(48, 6, n), 0, 100).round(1)
+    frame["PERGF"] = gf
+    frame["PERGM"] = (100 - gf - np.nan_to_num(gx)).round(1)
+    frame["PERGX"] = gx
+    alpha = np.array(list(RACE_SHARES.values())) / 100 * 3
+    race = rng.dirichlet(alpha, n) * 100
+    # Small groups are blank, and a few schools' shares don't add up
+    race = np.where(race < 0.1, np.nan, race.round(1))
+    race[rng.random(n) < 0.05] *= rng.uniform(0.8, 0.94)
+    for j, col in enumerate(RACE_SHARES):
+        frame[col] = race[:, j]
+    frame["PEREL"] = (100 * _sigmoid(-1.7 - 0.5 * adv + 0.7 * rows["ELL"].to_numpy())).round(1)
+    frame["PERFY"] = np.where(rng.random(n) < 0.65, rng.exponential(1.1, n).round(1), np.nan)
+    frame["PERH"] = np.where(rng.random(n) < 0.85, rng.exponential(5, n).round(1), np.nan)
+    frame["PERMIG"] = np.where(rng.random(n) < 0.3, rng.exponential(3, n).round(1), np.nan)
+    frame["PERSD"] = (100 * _sigmoid(0.8 - 1.4 * adv + rng.normal(0, 0.5, n))).round(1)
+    frame["PERDI"] = (100 * _sigmoid(-1.9 + rng.normal(0, 0.9, n) - 0.2 * adv)).round(1)
+    # Matched rows can still leave a program cell blank or suppressed
+    blank, suppressed = DNA_GAPS
+    for col in ("PEREL", "PERSD", "PERDI"):
+        u = rng.random(n)
+        cells = frame[col].astype(object)
+        cells[u < blank] = None
+        cells[(u >= blank) & (u < blank + suppressed)] = "--"
+        frame[col] = cells
+    return frame
+
+
+def generate(n_schools, seed=0, year=2024):
+    """
+    All five synthetic sources for *n_schools* directory schools.
+
+    Returns
+    -------
+    dict  –  source name (SOURCE_NAMES) → DataFrame in CDE column order.
+    """
+    rng = np.random.default_rng(seed)
+    layout = school_layout(n_schools, rng)
+    acselm, acssec = class_sizes(layout, year, rng)
+    return {
+        "schldir": directory(layout, year, rng),
+        "caall": caall(layout, year, rng),
+        "acselm": acselm,
+        "acssec": acssec,
+        "enrbysubgrp": enrollment(layout, year, rng),
+    }
+
+
+# ─── WRITERS ───────────────────────────────────────────────────────────
+def _sci_cds(codes, share, rng, as_number):
+    """Write *share* of CDS codes the way a spreadsheet round-trip leaves them."""
+    codes = codes.astype(object).copy()
+    pick = rng.random(len(codes)) < share
+    if pick.any():
+        value = codes[pick].astype(np.int64)
+        if as_number:
+            codes[pick] = value.astype(float)
+        else:
+            # Full precision, e.g. 1.9647336018022E+13; float() reads it back exactly
+            codes[pick] = [f"{v:.{len(str(v)) - 1}E}" for v in value]
+    return codes
+
+
+def _pin_xlsx(path):
+    """
+    Rewrite an .xlsx with fixed timestamps so equal contents give equal bytes.
+
+    openpyxl stamps the save time into docProps/core.xml and every zip
+    entry; both are pinned to XLSX_DATE.
+    """
+    with zipfile.ZipFile(path) as src:
+        entries = [(info.filename, src.read(info)) for info in src.infolist()]
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as dst:
+        for name, data in entries:
+            if name == "docProps/core.xml":
+                data = re.sub(rb"\d{4}-\d\d-\d\dT\d\d:\d\d:\d\dZ", b"1980-01-01T00:00:00Z", data)
+            dst.writestr(zipfile.ZipInfo(name, date_time=XLSX_DATE), data,
+                         compress_type=zipfile.ZIP_DEFLATED)
+
+
+def write_sources(frames, out, fmt="xlsx", sci_cds=SCI_CDS, seed=0):
+    """
+    Write each source to ``<out>/excel_files/<name>.<fmt>``.
+
+    Other copies of a source are removed first, since build_master.py
+    would pick a .txt over a fresh .xlsx. Returns {name: path}.
+    """
+    rng = np.random.default_rng(seed + 1)
+    folder = os.path.join(out, "excel_files")
+    os.makedirs(folder, exist_ok=True)
+    paths = {}
+    for name, frame in frames.items():
+        for ext in SOURCE_EXTS:
+            stale = os.path.join(folder, name + ext)
+            if os.path.exists(stale):
+                os.remove(stale)
+        cds_col = ID_HEADERS[name][0]
+        frame = frame.assign(**{cds_col: _sci_cds(frame[cds_col], sci_cds, rng, as_number=fmt == "xlsx")})
+        path = os.path.join(folder, f"{name}.{fmt}")
+        if fmt == "xlsx":
+            wb = openpyxl.Workbook(write_only=True)
+            ws = wb.create_sheet(name if name in ("schldir", "enrbysubgrp") else "Sheet1")
+            ws.append(list(frame.columns))
+            for row in frame.astype(object).where(frame.notna(), None).itertuples(index=False):
+                ws.append(list(row))
+            wb.save(path)
+            _pin_xlsx(path)
+        else:
+            frame.to_csv(path, sep="\t" if fmt == "txt" else ",", index=False)
+        paths[name] = path
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--schools", type=int, default=10_000, help="directory schools to generate")
+    parser.add_argument("--out", default="sarc_synth", help="output folder (gets an excel_files/ subfolder)")
+    parser.add_argument("--format", choices=["xlsx", "txt", "csv"], default="xlsx")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--year", type=int, default=2024, help="first year of the SARC school year")
+    parser.add_argument("--sci-cds", type=float, default=SCI_CDS,
+                        help="share of CDS codes written in scientific notation")
+    parser.add_argument("--build", action="store_true",
+                        help="then run build_master.py in the output folder")
+    args = parser.parse_args()
+
+    t = time.perf_counter()
+    frames = generate(args.schools, seed=args.seed, year=args.year)
+    print(f"🚀 Generated {args.schools} schools in {time.perf_counter() - t:.1f}s: "
+          + ", ".join(f"{k} {len(v)}" for k, v in frames.items()))
+    t = time.perf_counter()
+    paths = write_sources(frames, args.out, args.format, args.sci_cds, args.seed)
+    print(f"✅ SUCCESS: {len(paths)} {args.format} files written to "
+          f"'{os.path.join(args.out, 'excel_files')}' in {time.perf_counter() - t:.1f}s.")
+    if args.build:
+        here = os.getcwd()
+        os.chdir(args.out)
+        try:
+            build_sarc_master()
+        finally:
+            os.chdir(here)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Class size: the vectorized loader against the original three-pass
+mean-of-means, and the section-weighted mode against a direct pooled mean.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from build_master import _class_size_terms, _load_class_sizes, clean_cds, read_sheet
+
+ELEM = ["K", "1", "2"]
+SEC = ["EN", "MA"]
+# Streaming reads text files at least this many rows per chunk
+CHUNK_ROWS = 1_000
+TINY_MB = 1e-6
+
+ALL_NAN_CDS = "01100170000001"
+BOTH_FILES_CDS = "01100170000002"
+BOUNDARY_CDS = "01100170000003"
+ZERO_SECTIONS_CDS = "01100170000004"
+
+
+def _rows(rng, n, keys, codes):
+    """n rows of AVG / NCS / NCM / NCL Y1 cells as strings ('' = blank)."""
+    data = {"CDSCODE": rng.choice(codes, n)}
+    for x in keys:
+        data[f"AVG{x}_Y1"] = rng.integers(12, 35, n).astype(str).astype(object)
+        for size in "SML":
+            data[f"NC{size}{x}_Y1"] = rng.integers(0, 4, n).astype(str).astype(object)
+    frame = pd.DataFrame(data)
+    avg_cols = [f"AVG{x}_Y1" for x in keys]
+    # Scattered blank cells and a few fully blank rows
+    frame[avg_cols] = frame[avg_cols].mask(rng.random((n, len(keys))) < 0.1, "")
+    frame.loc[rng.random(n) < 0.05, avg_cols] = ""
+    return frame
+
+
+@pytest.fixture(scope="module")
+def sources(tmp_path_factory):
+    rng = np.random.default_rng(7)
+    codes = np.array([f"0110017{i:07d}" for i in range(10, 310)])
+    elem = _rows(rng, CHUNK_ROWS + 200, ELEM, codes)
+    sec = _rows(rng, 150, SEC, codes)
+    elem_avg = [f"AVG{x}_Y1" for x in ELEM]
+
+    # A CDS whose every row is blank
+    elem.loc[[3, 4], "CDSCODE"] = ALL_NAN_CDS
+    elem.loc[[3, 4], elem_avg] = ""
+    # A CDS in both files
+    elem.loc[5, "CDSCODE"] = sec.loc[5, "CDSCODE"] = BOTH_FILES_CDS
+    # A CDS with rows on both sides of the first chunk boundary
+    elem.loc[[CHUNK_ROWS - 1, CHUNK_ROWS], "CDSCODE"] = BOUNDARY_CDS
+    # Grades with no sections, reported as class size 0
+    elem.loc[6, "CDSCODE"] = ZERO_SECTIONS_CDS
+    elem.loc[6, elem_avg] = ["0", "24", "0"]
+    for size in "SML":
+        elem.loc[6, [f"NC{size}K_Y1", f"NC{size}2_Y1"]] = "0"
+    elem.loc[6, "NCS1_Y1"] = "2"
+
+    folder = tmp_path_factory.mktemp("excel_files")
+    paths = []
+    for name, frame in (("acselm", elem), ("acssec", sec)):
+        path = folder / f"{name}.txt"
+        frame.to_csv(path, sep="\t", index=False)
+        paths.append(str(path))
+    return paths
+
+
+def _mean_of_means(paths):
+    """The original three-pass definition: row means, per-file means, mean across files."""
+    per_file = []
+    for path in paths:
+        frame = pd.read_csv(path, sep="\t", dtype=str)
+        avg_cols = [c for c in frame.columns if c.startswith("AVG") and c.endswith("Y1")]
+        row_avg = frame[avg_cols].apply(pd.to_numeric, errors="coerce").mean(axis=1)
+        part = pd.DataFrame({"CDS": clean_cds(frame["CDSCODE"]),
+                             "SUM": row_avg.fillna(0), "COUNT": row_avg.notna().astype(int)})
+        totals = part.groupby("CDS")[["SUM", "COUNT"]].sum()
+        per_file.append(totals["SUM"] / totals["COUNT"])
+    return pd.concat(per_file).groupby(level=0).mean()
+
+
+def _pooled(paths):
+    """Σ class size · sections / Σ sections over every cell of both files."""
+    cells = []
+    for path in paths:
+        frame = pd.read_csv(path, sep="\t", dtype=str)
+        for col in [c for c in frame.columns if c.startswith("AVG") and c.endswith("Y1")]:
+            x = col[3:]
+            sections = sum(pd.to_numeric(frame[f"NC{size}{x}"], errors="coerce").fillna(0)
+                           for size in "SML")
+            avg = pd.to_numeric(frame[col], errors="coerce")
+            cells.append(pd.DataFrame({"CDS": clean_cds(frame["CDSCODE"]),
+                                       "SUM": (avg * sections).where(avg.notna(), 0),
+                                       "W": sections.where(avg.notna(), 0)}))
+    totals = pd.concat(cells).groupby("CDS")[["SUM", "W"]].sum()
+    return (totals["SUM"] / totals["W"]).where(totals["W"] > 0)
+
+
+def _as_series(result):
+    return result.set_index("CDS_JOIN_CLASS")["ROW_AVG"].sort_index()
+
+
+def test_fixture_spans_a_chunk_boundary(sources):
+    chunks = list(read_sheet(sources[0], TINY_MB))
+    assert len(chunks) == 2
+    assert BOUNDARY_CDS in set(chunks[0]["CDSCODE"]) & set(chunks[1]["CDSCODE"])
+
+
+@pytest.mark.parametrize("max_memory_mb", [None, TINY_MB], ids=["eager", "streamed"])
+def test_unweighted_matches_mean_of_means(sources, max_memory_mb):
+    got = _as_series(_load_class_sizes(sources, max_memory_mb))
+    want = _mean_of_means(sources).sort_index()
+    assert list(got.index) == list(want.index)
+    np.testing.assert_allclose(got.to_numpy(), want.to_numpy(), rtol=1e-12, equal_nan=True)
+    assert np.isnan(got[ALL_NAN_CDS])
+    assert not np.isnan(got[BOTH_FILES_CDS])
+
+
+@pytest.mark.parametrize("max_memory_mb", [None, TINY_MB], ids=["eager", "streamed"])
+def test_weighted_pools_sections(sources, max_memory_mb):
+    got = _as_series(_load_class_sizes(sources, max_memory_mb, weighted=True))
+    want = _pooled(sources).sort_index()
+    assert list(got.index) == list(want.index)
+    np.testing.assert_allclose(got.to_numpy(), want.to_numpy(), rtol=1e-12, equal_nan=True)
+    assert np.isnan(got[ALL_NAN_CDS])
+
+
+def test_zero_section_grades_drop_out_when_weighted():
+    chunk = pd.DataFrame({
+        "CDSCODE": [ZERO_SECTIONS_CDS],
+        "AVGK_Y1": ["0"], "AVG1_Y1": ["24"], "AVG2_Y1": ["0"],
+        "NCSK_Y1": ["0"], "NCS1_Y1": ["2"], "NCS2_Y1": ["0"],
+        "NCMK_Y1": ["0"], "NCM1_Y1": ["0"], "NCM2_Y1": ["0"],
+        "NCLK_Y1": ["0"], "NCL1_Y1": ["0"], "NCL2_Y1": ["0"],
+    })
+    total, weight = _class_size_terms(chunk, weighted=True)
+    assert total[0] / weight[0] == 24.0
+    row_mean, has = _class_size_terms(chunk, weighted=False)
+    assert (row_mean[0], has[0]) == (8.0, 1.0)
+
+
+def test_blank_rows_carry_no_weight():
+    chunk = pd.DataFrame({"CDSCODE": ["a", "b"], "AVGK_Y1": [None, "20"], "AVG1_Y1": [None, "--"]})
+    row_mean, has = _class_size_terms(chunk, weighted=False)
+    assert list(has) == [0.0, 1.0]
+    assert row_mean[1] == 20.0
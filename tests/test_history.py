@@ -0,0 +1,69 @@
+"""
+History store: prior-year backfill from the _Y2/_Y3 columns, and
+district trends keyed per county.
+"""
+import numpy as np
+import pandas as pd
+
+from build_master import backfill_history
+from history import append_year, available_years, latest_changes, load_history
+from metrics import MISSING_COL, missing_mask
+
+CDS = ["01100170000001", "01100170000002", "19100170000003"]
+
+
+def _master(year, math, county=("Alameda", "Alameda", "Los Angeles"), district=("Oak", "Oak", "Oak")):
+    frame = pd.DataFrame({"CDSCode": CDS, "County": list(county), "District": list(district),
+                          "School": ["A", "B", "C"], "SARCYEAR": year,
+                          "SMATH_Y1": math, "SELA_Y1": [50.0, 60.0, 70.0]})
+    return frame.assign(**{MISSING_COL: missing_mask(frame)}).fillna(0)
+
+
+def test_backfill_writes_prior_years_once(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    caall = tmp_path / "caall.txt"
+    pd.DataFrame({"CDSCODE": CDS, "SMATH_Y1": ["40", "50", "60"], "SMATH_Y2": ["30", "", "55"],
+                  "SELA_Y1": ["1", "2", "3"], "SELA_Y2": ["4", "5", "6"]}).to_csv(caall, sep="\t", index=False)
+    acselm = tmp_path / "acselm.txt"
+    pd.DataFrame({"CDSCODE": CDS, "AVGK_Y1": ["20", "21", "22"], "AVGK_Y2": ["23", "24", "25"],
+                  "AVGK_Y3": ["26", "", "28"]}).to_csv(acselm, sep="\t", index=False)
+    df = _master("2024-25", [40.0, 50.0, 60.0])
+    append_year(df)
+
+    written = backfill_history(df, str(caall), [str(acselm)])
+    assert written == ["2023-24", "2022-23"]
+    assert available_years() == ["2022-23", "2023-24", "2024-25"]
+    hist = load_history(["CDSCode", "SMATH_Y1", "AVG_SIZE", "PERDI"]).set_index(["YEAR", "CDSCode"])
+    assert hist.loc[("2023-24", CDS[0]), "SMATH_Y1"] == 30.0
+    assert np.isnan(hist.loc[("2023-24", CDS[1]), "SMATH_Y1"])
+    assert hist.loc[("2023-24", CDS[2]), "AVG_SIZE"] == 25.0
+    assert np.isnan(hist.loc[("2022-23", CDS[1]), "AVG_SIZE"])
+    # Y3 has no scores, and enrbysubgrp has no prior years at all
+    assert hist.loc["2022-23", "SMATH_Y1"].isna().all()
+    assert hist.loc["2023-24", "PERDI"].isna().all()
+    changes = latest_changes(["SMATH_Y1"]).set_index("CDSCode")["SMATH_Y1_CHG"]
+    assert changes[CDS[0]] == 10.0
+
+    # Stored years are never overwritten by a later backfill
+    assert backfill_history(df, str(caall), [str(acselm)]) == []
+
+
+def test_district_changes_are_per_county(tmp_path):
+    root = str(tmp_path)
+    append_year(_master("2023-24", [10.0, 20.0, 80.0]), root=root)
+    append_year(_master("2024-25", [20.0, 30.0, 70.0]), root=root)
+    changes = latest_changes(["SMATH_Y1"], level="District", root=root)
+    by_county = changes.set_index(["County", "District"])["SMATH_Y1_CHG"]
+    assert by_county[("Alameda", "Oak")] == 10.0
+    assert by_county[("Los Angeles", "Oak")] == -10.0
+
+
+def test_latest_changes_reads_only_the_two_latest_years(tmp_path):
+    root = str(tmp_path)
+    for start in range(2015, 2025):
+        append_year(_master(f"{start}-{(start + 1) % 100:02d}", [float(start)] * 3), root=root)
+    # Older partitions are never opened, so their size can't slow the query
+    for year in available_years(root)[:-2]:
+        (tmp_path / f"YEAR={year}" / "part-0.parquet").write_bytes(b"not parquet")
+    changes = latest_changes(["SMATH_Y1"], root=root)
+    assert changes["SMATH_Y1_CHG"].tolist() == [1.0, 1.0, 1.0]
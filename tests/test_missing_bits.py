@@ -0,0 +1,97 @@
+"""
+MISSING bitmask: files written under another metric order still decode.
+"""
+import json
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from build_master import _load_dna, _merge_sources
+from history import load_history
+from metrics import (
+    MISSING_BITS_KEY, MISSING_COL, is_missing, metric_cols, read_table, remap_missing,
+)
+from quality import QualityReport
+
+
+def _frame():
+    cols = metric_cols()
+    rng = np.random.default_rng(3)
+    values = rng.uniform(1, 99, (6, len(cols)))
+    values[rng.random(values.shape) < 0.3] = np.nan
+    frame = pd.DataFrame(values, columns=cols)
+    frame.insert(0, "CDSCode", [f"0110017000000{i}" for i in range(6)])
+    frame.insert(1, "County", "Alameda")
+    return frame
+
+
+def _encode(frame, bits):
+    """Frame as a build stores it: metrics 0-filled, MISSING under bit order *bits*."""
+    mask = np.zeros(len(frame), dtype=np.uint32)
+    for i, col in enumerate(bits):
+        if col in frame.columns:
+            mask |= np.where(frame[col].isna(), np.uint32(1 << i), np.uint32(0))
+    return frame.fillna(0).assign(**{MISSING_COL: mask})
+
+
+def _write(frame, path, bits):
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    meta = {**table.schema.metadata, MISSING_BITS_KEY: json.dumps(bits).encode()}
+    pq.write_table(table.replace_schema_metadata(meta), path)
+
+
+def test_remap_reordered_and_removed_metrics():
+    truth = _frame()
+    # Stored under an older registry: reversed, plus a metric since removed
+    bits = ["OLD_METRIC"] + metric_cols()[::-1]
+    stored = remap_missing(_encode(truth, bits), bits)
+    for col in metric_cols():
+        assert (is_missing(stored, col) == truth[col].isna().to_numpy()).all(), col
+
+
+def test_current_order_is_left_alone():
+    frame = _encode(_frame(), metric_cols())
+    assert remap_missing(frame, metric_cols()) is frame
+    assert remap_missing(frame, None) is frame
+
+
+def test_read_table_uses_file_metadata(tmp_path):
+    truth = _frame()
+    bits = metric_cols()[::-1]
+    path = tmp_path / "master.parquet"
+    _write(_encode(truth, bits), path, bits)
+    frame = read_table(path)
+    for col in metric_cols():
+        assert (is_missing(frame, col) == truth[col].isna().to_numpy()).all(), col
+
+
+def test_history_years_decode_with_their_own_order(tmp_path):
+    truth = _frame()
+    orders = {"2023-24": metric_cols()[::-1], "2024-25": metric_cols()}
+    for year, bits in orders.items():
+        folder = tmp_path / f"YEAR={year}"
+        folder.mkdir()
+        _write(_encode(truth, bits), folder / "part-0.parquet", bits)
+    hist = load_history(["CDSCode"] + metric_cols(), root=str(tmp_path))
+    for year in orders:
+        got = hist[hist["YEAR"] == year].reset_index(drop=True)
+        pd.testing.assert_frame_equal(got[metric_cols()], truth[metric_cols()], check_dtype=False)
+
+
+def test_blank_dna_cell_in_matched_row_is_missing(tmp_path):
+    path = tmp_path / "enrbysubgrp.txt"
+    pd.DataFrame({"CDSCODE": ["01100170000001", "01100170000002"],
+                  "PERDI": ["40.5", "12"], "PEREL": ["", "0"], "PERSD": ["9", "--"]}
+                 ).to_csv(path, sep="\t", index=False)
+    report = QualityReport()
+    dna = _load_dna(str(path), None, report)
+    directory = pd.DataFrame({"CDSCode": ["01100170000001", "01100170000002"],
+                              "County": "Alameda", "District": "D", "School": ["A", "B"]})
+    merged = _merge_sources(directory, None, None, dna, report)
+    # Both rows matched the DNA source; only the blank cells are missing
+    assert is_missing(merged, "PEREL").tolist() == [True, False]
+    assert is_missing(merged, "PERSD").tolist() == [False, True]
+    assert not is_missing(merged, "PERDI").any()
+    assert report.missing["PEREL"] == 1
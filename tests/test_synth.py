@@ -0,0 +1,26 @@
+"""
+Synthetic sources: blank and suppressed cells must reach the built master
+as MISSING bits, not as 0s.
+"""
+import pandas as pd
+
+from build_master import build_sarc_master, clean_cds
+from metrics import is_missing, read_table
+from synth import generate, write_sources
+
+
+def test_blank_and_suppressed_cells_are_missing_after_build(tmp_path, monkeypatch):
+    frames = generate(1500, seed=3)
+    write_sources(frames, str(tmp_path), fmt="txt", seed=3)
+    monkeypatch.chdir(tmp_path)
+    build_sarc_master()
+    master = read_table("sarc_master.parquet")
+
+    for name, col in [("caall", "SMATH_Y1"), ("caall", "SELA_Y1"), ("enrbysubgrp", "PEREL"),
+                      ("enrbysubgrp", "PERSD"), ("enrbysubgrp", "PERDI")]:
+        source = pd.read_csv(tmp_path / "excel_files" / f"{name}.txt", sep="\t", dtype=str,
+                             keep_default_na=False)
+        gaps = clean_cds(source["CDSCODE"])[source[col].isin(["", "--"])]
+        rows = master["CDSCode"].isin(set(gaps))
+        assert rows.any(), col
+        assert is_missing(master, col)[rows].all(), col
@@ -0,0 +1,268 @@
+"""
+Start the dashboard with its caches already warm.
+
+Under ``streamlit run app.py`` nothing is loaded until someone connects:
+the first visitor after a deploy pays for reading the master table,
+building the school, search and geo indexes and scoring their county, and
+the first visitor to every other county pays for scoring that one. The
+dashboard's cached loaders and score caches therefore live here rather
+than in app.py. This launcher fills those very caches in the server
+process while Streamlit starts, prints the cold-start time, and has
+/_stcore/health answer 503 "warming up" until everything is loaded, so a
+load balancer only sends visitors to a warm server.
+
+    python warmup.py                                  # same as streamlit run app.py
+    python warmup.py --top 20 --server.port 8080      # Streamlit flags pass through
+"""
+import argparse
+import logging
+import os
+import sys
+import threading
+import time
+
+import pandas as pd
+import pyarrow.parquet as pq
+import streamlit as st
+
+from catalog import SchoolIndex
+from geo import GeoIndex, nearby, read_zip_table
+from history import latest_changes
+from metrics import master_columns, read_table, trend_cols
+from scoring import default_settings, rank_districts, rank_schools, read_leaderboards
+from search import SEARCH_PATH, SearchIndex
+
+MASTER_PATH = "sarc_master.parquet"
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+# County the dashboard opens on
+DEFAULT_COUNTY = "San Diego"
+# Counties primed at start-up besides DEFAULT_COUNTY, largest first
+WARM_COUNTIES = int(os.environ.get("SARC_WARM_COUNTIES", 10))
+
+
+class _BareCallFilter(logging.Filter):
+    """
+    Drop the two warnings Streamlit logs for caches used outside a session.
+
+    The launcher defines the caches before the runtime exists ("No runtime
+    found") and fills them from the warm-up thread, outside any script run
+    ("missing ScriptRunContext"); both are expected here and would
+    otherwise log once per cache call. Any other record passes, whichever
+    thread logs it.
+    """
+
+    def filter(self, record):
+        msg = record.getMessage()
+        if msg.startswith("No runtime found"):
+            return False
+        return not (threading.current_thread().name == "warmup"
+                    and "missing ScriptRunContext" in msg)
+
+
+for _name in ("streamlit.runtime.caching.cache_data_api",
+              "streamlit.runtime.scriptrunner_utils.script_run_context"):
+    logging.getLogger(_name).addFilter(_BareCallFilter())
+
+
+# ─── DATA ──────────────────────────────────────────────────────────────
+# Every loader and score cache takes the master file's data_version, so a
+# rebuild keys fresh entries instead of serving the previous file's frames
+@st.cache_data
+def load_data(data_version):
+    if os.path.exists(MASTER_PATH):
+        # Registry projection: older master files may carry extra columns
+        present = pq.read_schema(MASTER_PATH).names
+        return read_table(MASTER_PATH, columns=[c for c in master_columns() if c in present])
+    return pd.DataFrame()
+
+
+@st.cache_data
+def load_leaderboards(data_version):
+    """
+    Precomputed default-profile leaderboards, keyed by (County, Level);
+    {} when absent or built under another SARC_MISSING_MODE.
+    """
+    return read_leaderboards()
+
+
+@st.cache_data
+def load_trends(county, level, data_version):
+    """Latest year-over-year Math/ELA change for one county (empty if one year)."""
+    return latest_changes(trend_cols(), level=level, county=county)
+
+
+@st.cache_resource
+def load_index(data_version):
+    """County → District → School index, rebuilt only when the master file changes."""
+    return SchoolIndex.from_frame(load_data(data_version))
+
+
+@st.cache_resource
+def load_search(data_version):
+    """Statewide name / city / CDS search index (None until the builder writes it)."""
+    if os.path.exists(SEARCH_PATH):
+        return SearchIndex.load()
+    return None
+
+
+@st.cache_resource
+def load_geo(data_version):
+    """Grid index over school coordinates (empty when the master has none)."""
+    return GeoIndex.from_frame(load_data(data_version), zips=read_zip_table())
+
+
+def data_version():
+    return os.path.getmtime(MASTER_PATH) if os.path.exists(MASTER_PATH) else 0
+
+
+# ─── SCORING ──────────────────────────────────────────────────────────
+@st.cache_data(max_entries=256)
+def score_county(county, settings, data_version):
+    """Ranked (schools, districts) for one county under *settings*.
+
+    Untouched sliders → plain lookup into the build-time leaderboards;
+    the live engine only runs once a weight or target has moved. Shared
+    across sessions, so common profiles are scored once per server.
+    Both frames carry the per-metric score points (``<metric>_PTS``).
+    """
+    leaderboards = load_leaderboards(data_version)
+    if settings == default_settings() and (county, "School") in leaderboards:
+        return leaderboards[(county, "School")], leaderboards[(county, "District")]
+    df = load_data(data_version)
+    scored = rank_schools(df[df["County"] == county], settings, contributions=True)
+    return scored, rank_districts(scored)
+
+
+@st.cache_data(max_entries=8)
+def score_state(settings, data_version):
+    """Statewide (schools, districts) ranking, for exports; districts carry their County."""
+    scored = rank_schools(load_data(data_version), settings)
+    return scored, rank_districts(scored)
+
+
+@st.cache_data(max_entries=64)
+def score_nearby(point, miles, settings, data_version):
+    """Ranked (schools, districts) within *miles* of *point*, across county lines."""
+    geo_index = load_geo(data_version)
+    scored = rank_schools(nearby(load_data(data_version), geo_index, *point, miles=miles), settings,
+                          contributions=True)
+    return scored, rank_districts(scored)
+
+
+# ─── WARM-UP ───────────────────────────────────────────────────────────
+# Set once the background warm-up has finished or given up; gates health
+_settled = threading.Event()
+# Seconds per warm-up stage, filled in as they finish
+cold_start = {}
+
+
+def warm_counties(df, top=WARM_COUNTIES):
+    """DEFAULT_COUNTY, then the *top* counties with the most schools."""
+    by_size = df["County"].value_counts().index.tolist() if "County" in df.columns else []
+    counties = [DEFAULT_COUNTY] if DEFAULT_COUNTY in by_size else []
+    return counties + [c for c in by_size if c != DEFAULT_COUNTY][:top]
+
+
+def warm_up(top=WARM_COUNTIES):
+    """
+    Fill the dashboard's caches: master table, leaderboards, the school,
+    search and geo indexes, and default-profile scores
+    and trends for warm_counties. Safe to call again (later calls are
+    cache hits).
+
+    Returns
+    -------
+    dict  –  seconds per stage plus 'total'.
+    """
+    t0 = time.perf_counter()
+
+    def stage(name, fn, *args):
+        t = time.perf_counter()
+        result = fn(*args)
+        cold_start[name] = time.perf_counter() - t
+        return result
+
+    version = data_version()
+    df = stage("master table", load_data, version)
+    stage("leaderboards", load_leaderboards, version)
+    stage("school index", load_index, version)
+    stage("search index", load_search, version)
+    stage("geo index", load_geo, version)
+    settings = default_settings()
+    counties = warm_counties(df, top)
+
+    def prime():
+        for county in counties:
+            score_county(county, settings, version)
+            for level in ("School", "District"):
+                load_trends(county, level, version)
+
+    stage(f"{len(counties)} counties", prime)
+    cold_start["total"] = time.perf_counter() - t0
+    return cold_start
+
+
+def _gate_health():
+    """
+    Have /_stcore/health report "warming up" (503) until the background
+    warm-up has finished, or failed and left the caches to fill lazily.
+
+    Streamlit has no hook for its health check, so this wraps the private
+    ``Runtime.is_ready_for_browser_connection`` property the health handler
+    awaits (as of streamlit 1.66, the floor in requirements.txt). If a
+    later release moves it, the launcher warns and serves with an ungated
+    health check rather than failing to start.
+    """
+    from streamlit.runtime.runtime import Runtime
+
+    prop = getattr(Runtime, "is_ready_for_browser_connection", None)
+    if not isinstance(prop, property):
+        print("⚠️ This Streamlit has no Runtime.is_ready_for_browser_connection; "
+              "/_stcore/health will answer 200 during warm-up.")
+        return
+    ready_for_browser = prop.fget
+
+    async def is_ready(self):
+        ok, msg = await ready_for_browser(self)
+        if ok and not _settled.is_set():
+            return False, "warming up"
+        return ok, msg
+
+    Runtime.is_ready_for_browser_connection = property(is_ready)
+
+
+def _warm_in_background(top):
+    print(f"🚀 Warming caches ({top} counties besides {DEFAULT_COUNTY})...")
+    try:
+        report = warm_up(top)
+    except Exception as exc:
+        # The server still runs, just lazily; health goes back to 200 so the
+        # frontend (which pings it before connecting) can reach it
+        print(f"❌ Warm-up failed, serving with cold caches: {exc!r}")
+        return
+    finally:
+        _settled.set()
+    steps = " · ".join(f"{k} {v:.2f}s" for k, v in report.items() if k != "total")
+    print(f"✅ Warm in {report['total']:.2f}s ({steps})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0],
+                                     epilog="Other options are passed to `streamlit run`.")
+    parser.add_argument("--top", type=int, default=WARM_COUNTIES,
+                        help="counties to pre-score besides the default one")
+    args, streamlit_args = parser.parse_known_args()
+
+    from streamlit.web import cli as stcli
+
+    _gate_health()
+    threading.Thread(target=_warm_in_background, args=(args.top,), name="warmup", daemon=True).start()
+    sys.argv = ["streamlit", "run", APP_PATH, *streamlit_args]
+    sys.exit(stcli.main())
+
+
+if __name__ == "__main__":
+    # Run through the importable module so app.py's `import warmup` shares
+    # these caches (functions defined in __main__ would be keyed apart)
+    import warmup
+    warmup.main()